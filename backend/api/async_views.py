@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import FileResponse
+from django.urls import URLPattern
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_WORKERS,
+    thread_name_prefix="sogustika-async",
+)
+
+
+def render_response(view, request, *args, **kwargs):
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        if response.streaming and not isinstance(response, FileResponse):
+            response.streaming_content = list(response.streaming_content)
+        return response
+    finally:
+        close_old_connections()
+
+
+run_in_pool = sync_to_async(
+    render_response, thread_sensitive=False, executor=executor
+)
+run_in_main_thread = sync_to_async(render_response, thread_sensitive=True)
+
+
+def async_view(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await run_in_pool(view, request, *args, **kwargs)
+        return await run_in_main_thread(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_urls(urlpatterns, names):
+    if not settings.ASYNC_READ_VIEWS:
+        return urlpatterns
+    return [
+        (
+            URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+            if pattern.name in names
+            else pattern
+        )
+        for pattern in urlpatterns
+    ]
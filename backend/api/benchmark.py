@@ -0,0 +1,157 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from api.loaders import get_default_path, load_ingredients, load_tags
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    recount_recipe_counters,
+)
+
+User = get_user_model()
+
+IMAGE = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21bKAAAAA1"
+    "BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIhvDMAAAAASUVORK"
+    "5CYII="
+)
+
+
+@contextmanager
+def benchmark_database(keepdb=False, verbosity=0):
+    old_name = connection.settings_dict["NAME"]
+    setup_test_environment()
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=verbosity, keepdb=keepdb
+        )
+        teardown_test_environment()
+
+
+def seed(
+    users=100,
+    recipes=1000,
+    ingredients_per_recipe=5,
+    favorites_per_user=20,
+    carts_per_user=5,
+    subscriptions_per_user=10,
+    batch_size=5000,
+    random_seed=0,
+):
+    rnd = random.Random(random_seed)
+    if not Ingredient.objects.exists():
+        load_ingredients(get_default_path(), batch_size)
+    load_tags()
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"user{i}",
+                email=f"user{i}@example.com",
+                first_name=f"Имя{i}",
+                last_name=f"Фамилия{i}",
+                password="!",
+            )
+            for i in range(users)
+        ),
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.values_list("id", flat=True))
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=rnd.choice(user_ids),
+                name=f"Рецепт {i}",
+                text=f"Описание рецепта {i}",
+                cooking_time=rnd.randint(1, 180),
+                ingredients_count=ingredients_per_recipe,
+            )
+            for i in range(recipes)
+        ),
+        batch_size=batch_size,
+    )
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+    tag_ids = list(Tag.objects.values_list("id", flat=True))
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rnd.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rnd.sample(
+                ingredient_ids, ingredients_per_recipe
+            )
+        ),
+        batch_size=batch_size,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rnd.sample(tag_ids, rnd.randint(1, len(tag_ids)))
+        ),
+        batch_size=batch_size,
+    )
+    for attribute, per_user in (
+        ("favorites", favorites_per_user),
+        ("shopping_cart", carts_per_user),
+    ):
+        through = getattr(User, attribute).through
+        through.objects.bulk_create(
+            (
+                through(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rnd.sample(
+                    recipe_ids, min(per_user, len(recipe_ids))
+                )
+            ),
+            batch_size=batch_size,
+        )
+    through = User.subscriptions.through
+    through.objects.bulk_create(
+        (
+            through(from_user_id=user_id, to_user_id=author_id)
+            for user_id in user_ids
+            for author_id in rnd.sample(
+                user_ids, min(subscriptions_per_user, len(user_ids))
+            )
+            if author_id != user_id
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    recount_recipe_counters(Recipe, User)
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentiles(timings)
@@ -0,0 +1,262 @@
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+User = get_user_model()
+
+VERSION_KEY = "sogustika:version:{}"
+TAGS_VERSION = "tags"
+INGREDIENTS_VERSION = "ingredients"
+VIEWER_STATE_KEY = "sogustika:viewer:{}:{}"
+VIEWER_VERSION_KEY = "sogustika:viewer:{}:version"
+RESPONSE_KEY = "sogustika:response:{}"
+RECIPES_VERSION = "recipes"
+RECIPE_AUTHOR_VERSION = "recipes:author:{}"
+RECIPE_TAG_VERSION = "recipes:tag:{}"
+RECIPE_DETAIL_VERSION = "recipes:detail:{}"
+PAGE_PARAM = "page"
+AUTHOR_PARAM = "author"
+TAGS_PARAM = "tags"
+CACHED_LIST_PARAMS = {
+    PAGE_PARAM,
+    settings.PAGE_SIZE_QUERY_PARAM,
+    AUTHOR_PARAM,
+    TAGS_PARAM,
+}
+VIEWER_RELATIONS = {
+    "favorites": ("user_id", "recipe_id"),
+    "shopping_cart": ("user_id", "recipe_id"),
+    "subscriptions": ("from_user_id", "to_user_id"),
+}
+VIEWER_FLAGS = (
+    ("is_favorited", "favorites", "id"),
+    ("is_in_shopping_cart", "shopping_cart", "id"),
+    ("is_subscribed", "subscriptions", "author_id"),
+)
+
+
+def get_version(name):
+    versions = caches["versions"]
+    key = VERSION_KEY.format(name)
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, uuid4().hex, timeout=None)
+        version = versions.get(key)
+    return version
+
+
+def bump_version(name):
+    caches["versions"].set(VERSION_KEY.format(name), uuid4().hex, timeout=None)
+
+
+def get_versions(names):
+    keys = [VERSION_KEY.format(name) for name in names]
+    found = caches["versions"].get_many(keys)
+    return [
+        found.get(key) or get_version(name) for name, key in zip(names, keys)
+    ]
+
+
+def bump_versions(names):
+    caches["versions"].set_many(
+        {VERSION_KEY.format(name): uuid4().hex for name in names},
+        timeout=None,
+    )
+
+
+class VersionedCache(ABC):
+    version_name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    @abstractmethod
+    def build(self):
+        pass
+
+    def get_state(self):
+        version = get_version(self.version_name)
+        state = self._state
+        if state is None or state[0] != version:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != version:
+                    state = (version, self.build())
+                    self._state = state
+        return state[1]
+
+
+class ReferenceDataCache(VersionedCache):
+    def __init__(self, version_name, queryset, serializer_class):
+        super().__init__()
+        self.version_name = version_name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+
+    def build(self):
+        renderer = JSONRenderer()
+        details = {
+            str(obj.pk): renderer.render(self.serializer_class(obj).data)
+            for obj in self.queryset.all()
+        }
+        body = b"[" + b",".join(details.values()) + b"]"
+        return (
+            (body, make_etag(body)),
+            {pk: (data, make_etag(data)) for pk, data in details.items()},
+        )
+
+    def list(self):
+        return self.get_state()[0]
+
+    def detail(self, pk):
+        return self.get_state()[1].get(str(pk))
+
+
+def make_etag(body):
+    return '"{}"'.format(hashlib.sha1(body).hexdigest())
+
+
+def cached_response(request, body, etag):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        etags = [
+            tag.replace("W/", "", 1) for tag in parse_etags(if_none_match)
+        ]
+        if "*" in etags or etag in etags:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    return response
+
+
+def get_response_key(request, names, *parts):
+    versions = get_versions((TAGS_VERSION, INGREDIENTS_VERSION, *names))
+    origin = (request.scheme, request.get_host())
+    digest = hashlib.sha1(repr((origin, parts, versions)).encode()).hexdigest()
+    return RESPONSE_KEY.format(digest)
+
+
+def get_recipe_list_key(request):
+    query_params = request.query_params
+    if not set(query_params) <= CACHED_LIST_PARAMS:
+        return None
+    page = query_params.get(PAGE_PARAM, "1")
+    limit = query_params.get(
+        settings.PAGE_SIZE_QUERY_PARAM, str(settings.POSTS_ON_PAGE)
+    )
+    author = query_params.get(AUTHOR_PARAM)
+    tags = sorted(set(query_params.getlist(TAGS_PARAM)))
+    if not all(value.isdigit() for value in (page, limit, author or "0")):
+        return None
+    if author:
+        names = [RECIPE_AUTHOR_VERSION.format(author)]
+    elif tags:
+        names = [RECIPE_TAG_VERSION.format(slug) for slug in tags]
+    else:
+        names = [RECIPES_VERSION]
+    return get_response_key(
+        request,
+        names,
+        "list",
+        int(page),
+        min(int(limit), settings.MAX_PAGE_SIZE),
+        author,
+        tags,
+    )
+
+
+def get_recipe_detail_key(request, pk):
+    if not str(pk).isdigit():
+        return None
+    return get_response_key(
+        request, [RECIPE_DETAIL_VERSION.format(pk)], "detail", int(pk)
+    )
+
+
+def get_recipe_version_names(recipes):
+    names = set()
+    for pk, author_id, slug in recipes.values_list(
+        "id", "author_id", "tags__slug"
+    ):
+        names.add(RECIPES_VERSION)
+        names.add(RECIPE_DETAIL_VERSION.format(pk))
+        names.add(RECIPE_AUTHOR_VERSION.format(author_id))
+        if slug is not None:
+            names.add(RECIPE_TAG_VERSION.format(slug))
+    return names
+
+
+def invalidate_recipe_responses(recipes, tag_slugs=()):
+    if not settings.ANONYMOUS_RECIPE_CACHE:
+        return
+    names = get_recipe_version_names(recipes)
+    names.update(RECIPE_TAG_VERSION.format(slug) for slug in tag_slugs)
+    if names:
+        transaction.on_commit(lambda: bump_versions(names))
+
+
+def get_viewer_state_key(user_id):
+    viewer_cache = caches["viewer_state"]
+    version_key = VIEWER_VERSION_KEY.format(user_id)
+    version = viewer_cache.get(version_key)
+    if version is None:
+        viewer_cache.add(version_key, uuid4().hex, timeout=None)
+        version = viewer_cache.get(version_key)
+    return VIEWER_STATE_KEY.format(user_id, version)
+
+
+def get_viewer_state(user_id):
+    viewer_cache = caches["viewer_state"]
+    key = get_viewer_state_key(user_id)
+    state = viewer_cache.get(key)
+    if state is None:
+        state = {}
+        for name, (owner, target) in VIEWER_RELATIONS.items():
+            through = getattr(User, name).through
+            state[name] = array(
+                "q",
+                through.objects.filter(**{owner: user_id})
+                .order_by(target)
+                .values_list(target, flat=True),
+            )
+        viewer_cache.set(key, state)
+    return state
+
+
+def invalidate_viewer_state(user_ids):
+    caches["viewer_state"].set_many(
+        {
+            VIEWER_VERSION_KEY.format(user_id): uuid4().hex
+            for user_id in user_ids
+        },
+        timeout=None,
+    )
+
+
+def contains(ids, pk):
+    index = bisect_left(ids, pk)
+    return index < len(ids) and ids[index] == pk
+
+
+def apply_viewer_state(recipes, user_id):
+    state = get_viewer_state(user_id)
+    for recipe in recipes:
+        for flag, name, attribute in VIEWER_FLAGS:
+            setattr(
+                recipe, flag, contains(state[name], getattr(recipe, attribute))
+            )
+    return recipes
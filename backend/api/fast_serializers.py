@@ -0,0 +1,145 @@
+from collections import defaultdict
+
+from api.cache import VIEWER_FLAGS, contains
+from django.contrib.auth import get_user_model
+from recipes.models import Recipe, RecipeIngredient
+from recipes.storage import image_storage
+
+User = get_user_model()
+
+RECIPE_ROW_FIELDS = (
+    "id",
+    "author_id",
+    "name",
+    "image",
+    "image_variants",
+    "text",
+    "cooking_time",
+    "pub_date",
+    "created_at",
+    "favorites_count",
+    "in_carts_count",
+)
+AUTHOR_FIELDS = ("email", "username", "first_name", "last_name", "id")
+COVERAGE_FIELDS = (
+    ("coverage", float),
+    ("ingredients_matched", int),
+    ("ingredients_total", int),
+)
+
+
+def get_recipe_rows(queryset):
+    return queryset.prefetch_related(None).values(
+        *RECIPE_ROW_FIELDS, *queryset.query.annotations
+    )
+
+
+def convert(value, func):
+    return None if value is None else func(value)
+
+
+class FastRecipeSerializer:
+    def __init__(self, request=None, viewer_state=None, extra_fields=()):
+        self.request = request
+        self.viewer_state = viewer_state
+        self.extra_fields = extra_fields
+
+    def build_url(self, name):
+        url = image_storage.url(name)
+        if self.request is not None:
+            url = self.request.build_absolute_uri(url)
+        return url
+
+    def get_flags(self, row):
+        if self.viewer_state is None:
+            return {
+                flag: bool(row.get(flag, False)) for flag, _, _ in VIEWER_FLAGS
+            }
+        return {
+            flag: contains(self.viewer_state[name], row[attribute])
+            for flag, name, attribute in VIEWER_FLAGS
+        }
+
+    def get_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        for row in (
+            RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("recipe_id", "id")
+            .values_list(
+                "recipe_id",
+                "ingredient_id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        ):
+            recipe_id, pk, name, measurement_unit, amount = row
+            ingredients[recipe_id].append(
+                {
+                    "id": pk,
+                    "name": name,
+                    "measurement_unit": measurement_unit,
+                    "amount": convert(amount, int),
+                }
+            )
+        return ingredients
+
+    def get_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        for recipe_id, pk, name, color, slug in (
+            Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("tag__name")
+            .values_list(
+                "recipe_id", "tag_id", "tag__name", "tag__color", "tag__slug"
+            )
+        ):
+            tags[recipe_id].append(
+                {"id": pk, "name": name, "color": color, "slug": slug}
+            )
+        return tags
+
+    def get_authors(self, author_ids):
+        return {
+            author["id"]: author
+            for author in User.objects.filter(id__in=author_ids).values(
+                *AUTHOR_FIELDS
+            )
+        }
+
+    def serialize(self, rows):
+        rows = list(rows)
+        recipe_ids = [row["id"] for row in rows]
+        ingredients = self.get_ingredients(recipe_ids)
+        tags = self.get_tags(recipe_ids)
+        authors = self.get_authors({row["author_id"] for row in rows})
+        data = []
+        for row in rows:
+            flags = self.get_flags(row)
+            image_variants = row["image_variants"]
+            if image_variants is not None:
+                image_variants = {
+                    variant: self.build_url(name)
+                    for variant, name in image_variants.items()
+                }
+            recipe = {
+                "id": row["id"],
+                "tags": tags[row["id"]],
+                "author": dict(
+                    authors[row["author_id"]],
+                    is_subscribed=flags["is_subscribed"],
+                ),
+                "ingredients": ingredients[row["id"]],
+                "is_favorited": flags["is_favorited"],
+                "is_in_shopping_cart": flags["is_in_shopping_cart"],
+                "name": row["name"],
+                "image": (
+                    self.build_url(row["image"]) if row["image"] else None
+                ),
+                "image_variants": image_variants,
+                "text": row["text"],
+                "cooking_time": row["cooking_time"],
+            }
+            for field, func in self.extra_fields:
+                recipe[field] = convert(row[field], func)
+            data.append(recipe)
+        return data
@@ -1,20 +1,129 @@
+from django import forms
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
-from recipes.models import Recipe
+from recipes.models import SEARCH_CONFIG, Recipe, Tag
+from rest_framework.filters import OrderingFilter
+
+User = get_user_model()
+
+SEARCH_RANK = "search_rank"
+COVERAGE = "coverage"
+FAVORITED_AT = "favorited_at"
+ADDED_TO_CART_AT = "added_to_cart_at"
+RANKINGS = {
+    SEARCH_RANK: (f"-{SEARCH_RANK}",),
+    COVERAGE: (f"-{COVERAGE}", "-ingredients_matched"),
+    FAVORITED_AT: (f"-{FAVORITED_AT}",),
+    ADDED_TO_CART_AT: (f"-{ADDED_TO_CART_AT}",),
+}
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    field_class = forms.IntegerField
 
 
 class RecipeFilterSet(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = filters.ModelMultipleChoiceFilter(
+        field_name="tags__slug",
+        to_field_name="slug",
+        queryset=Tag.objects.all(),
+    )
     is_favorited = filters.BooleanFilter(method="get_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
         method="get_is_in_shopping_cart"
     )
+    search = filters.CharFilter(method="get_search")
+    ingredients = NumberInFilter(method="get_coverage")
 
     def get_is_in_shopping_cart(self, queryset, name, value):
-        return queryset.filter(is_in_shopping_cart=True) if value else queryset
+        if not value:
+            return queryset
+        return self.filter_added_by_user(
+            queryset, User.shopping_cart.through, ADDED_TO_CART_AT
+        )
 
     def get_is_favorited(self, queryset, name, value):
-        return queryset.filter(is_favorited=True) if value else queryset
+        if not value:
+            return queryset
+        return self.filter_added_by_user(
+            queryset, User.favorites.through, FAVORITED_AT
+        )
+
+    def filter_added_by_user(self, queryset, through, annotation):
+        added = through.objects.filter(
+            user_id=self.request.user.id, recipe_id=OuterRef("id")
+        )
+        return queryset.annotate(
+            **{annotation: Subquery(added.values("created_at"))}
+        ).filter(**{f"{annotation}__isnull": False})
+
+    def get_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        if connections[queryset.db].vendor != "postgresql":
+            return queryset.filter(
+                Q(name__icontains=value)
+                | Q(text__icontains=value)
+                | Q(ingredients__name__icontains=value)
+            ).distinct()
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return queryset.filter(search_vector=query).annotate(
+            **{
+                SEARCH_RANK: Cast(
+                    SearchRank(F("search_vector"), query), FloatField()
+                )
+            }
+        )
+
+    def get_coverage(self, queryset, name, value):
+        ingredient_ids = set(value)
+        if not ingredient_ids:
+            return queryset
+        return (
+            queryset.filter(
+                recipe_ingredients__ingredient_id__in=ingredient_ids
+            )
+            .annotate(
+                ingredients_total=F("ingredients_count"),
+                ingredients_matched=Count(
+                    "recipe_ingredients__ingredient_id", distinct=True
+                ),
+            )
+            .annotate(
+                **{
+                    COVERAGE: ExpressionWrapper(
+                        Cast("ingredients_matched", FloatField())
+                        / F("ingredients_total"),
+                        output_field=FloatField(),
+                    )
+                }
+            )
+        )
 
     class Meta:
         model = Recipe
         fields = ("author",)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    def get_ordering(self, request, queryset, view):
+        if self.ordering_param not in request.query_params:
+            for annotation, ordering in RANKINGS.items():
+                if annotation in queryset.query.annotations:
+                    return ordering + tuple(view.ordering)
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,59 @@
+import io
+from pathlib import PurePosixPath
+
+from api.cache import invalidate_recipe_responses
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image
+from recipes.models import Recipe
+from recipes.storage import image_storage, lock_image
+
+
+def get_variant_name(image_name, variant):
+    path = PurePosixPath(image_name)
+    return str(path.parent / "variants" / f"{path.stem}_{variant}.webp")
+
+
+def get_variant_names(image_name):
+    if not image_name:
+        return {}
+    return {
+        variant: get_variant_name(image_name, variant)
+        for variant in settings.IMAGE_VARIANTS
+    }
+
+
+def generate_image_variants(recipe_id, image_name):
+    variants = get_variant_names(image_name)
+    missing = {
+        variant: name
+        for variant, name in variants.items()
+        if not image_storage.exists(name)
+    }
+    if missing:
+        with image_storage.open(image_name) as file:
+            original = Image.open(file)
+            original.load()
+        if original.mode not in ("RGB", "RGBA"):
+            original = original.convert("RGBA")
+        for variant, name in missing.items():
+            image = original.copy()
+            image.thumbnail(settings.IMAGE_VARIANTS[variant])
+            buffer = io.BytesIO()
+            image.save(buffer, "WEBP", quality=settings.IMAGE_VARIANT_QUALITY)
+            image_storage.save_exact(name, ContentFile(buffer.getvalue()))
+    recipes = Recipe.objects.filter(id=recipe_id, image=image_name)
+    if recipes.update(image_variants=variants):
+        invalidate_recipe_responses(recipes)
+
+
+def delete_orphaned_image(image_name):
+    if not image_name:
+        return
+    with transaction.atomic():
+        lock_image(image_name)
+        if Recipe.objects.filter(image=image_name).exists():
+            return
+        for name in (image_name, *get_variant_names(image_name).values()):
+            image_storage.delete(name)
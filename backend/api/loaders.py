@@ -0,0 +1,204 @@
+import csv
+import json
+import random
+import re
+import time
+from itertools import islice
+from pathlib import Path
+
+from api.cache import (
+    INGREDIENTS_VERSION,
+    TAGS_VERSION,
+    bump_version,
+    invalidate_recipe_responses,
+)
+from decouple import config
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+CHUNK_SIZE = 64 * 1024
+SEPARATORS = re.compile(r"[\s,]*")
+INGREDIENT_FIELDS = ("name", "measurement_unit")
+TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+)
+SAMPLE_AUTHOR = {
+    "username": "sogustika",
+    "email": "sogustika@example.com",
+    "first_name": "Согустика",
+    "last_name": "Примеры",
+}
+
+
+class LoaderError(ValueError):
+    pass
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    buffer, position, started = "", 0, False
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise LoaderError("Файл должен содержать JSON-массив")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                pass
+            else:
+                yield item
+                continue
+        chunk = file.read(chunk_size)
+        if not chunk:
+            raise LoaderError("Неожиданный конец JSON-файла")
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_csv_rows(file):
+    for row in csv.DictReader(file, fieldnames=INGREDIENT_FIELDS):
+        if tuple(row.values()) != INGREDIENT_FIELDS:
+            yield row
+
+
+def read_ingredients(file, format):
+    rows = iter_json_array(file) if format == "json" else iter_csv_rows(file)
+    for row in rows:
+        name = (row.get("name") or "").strip()
+        measurement_unit = (row.get("measurement_unit") or "").strip()
+        if name and measurement_unit:
+            yield Ingredient(name=name, measurement_unit=measurement_unit)
+
+
+def get_default_path():
+    return config(
+        "PATH_TO_JSON",
+        default=str(settings.BASE_DIR.parent / "data" / "ingredients.json"),
+    )
+
+
+def get_format(path):
+    format = Path(path).suffix.lstrip(".").lower()
+    if format not in ("json", "csv"):
+        raise LoaderError(f"Неизвестный формат файла {path}")
+    return format
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def load_ingredients(path, batch_size, progress=None):
+    format = get_format(path)
+    before = Ingredient.objects.count()
+    rows = 0
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", newline="") as file:
+        for batch in batched(read_ingredients(file, format), batch_size):
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+            rows += len(batch)
+            if progress is not None:
+                progress(rows, time.perf_counter() - start)
+    bump_version(INGREDIENTS_VERSION)
+    return rows, Ingredient.objects.count() - before
+
+
+def load_tags(tags=TAGS):
+    before = Tag.objects.count()
+    Tag.objects.bulk_create(
+        (Tag(name=name, color=color, slug=slug) for name, color, slug in tags),
+        ignore_conflicts=True,
+    )
+    bump_version(TAGS_VERSION)
+    return Tag.objects.count() - before
+
+
+def get_sample_author():
+    author, created = User.objects.get_or_create(
+        username=SAMPLE_AUTHOR["username"], defaults=SAMPLE_AUTHOR
+    )
+    if created:
+        author.set_unusable_password()
+        author.save(update_fields=["password"])
+    return author
+
+
+@transaction.atomic
+def load_sample_recipes(
+    count, batch_size, ingredients_per_recipe=5, random_seed=0
+):
+    rnd = random.Random(random_seed)
+    author = get_sample_author()
+    ingredient_ids = list(
+        Ingredient.objects.order_by("id").values_list("id", flat=True)
+    )
+    tag_ids = list(Tag.objects.order_by("id").values_list("id", flat=True))
+    if not ingredient_ids or not tag_ids:
+        raise LoaderError("Сначала загрузите ингредиенты и теги")
+    ingredients_count = min(ingredients_per_recipe, len(ingredient_ids))
+    existing = set(author.recipes.values_list("name", flat=True))
+    created = 0
+    for batch in batched(range(count), batch_size):
+        recipes = [
+            Recipe(
+                author=author,
+                name=f"Пример рецепта {i + 1}",
+                text=f"Описание примера рецепта {i + 1}",
+                cooking_time=rnd.randint(5, 120),
+                ingredients_count=ingredients_count,
+            )
+            for i in batch
+        ]
+        recipes = [recipe for recipe in recipes if recipe.name not in existing]
+        if not recipes:
+            continue
+        Recipe.objects.bulk_create(recipes, ignore_conflicts=True)
+        recipe_ids = list(
+            author.recipes.filter(
+                name__in=[recipe.name for recipe in recipes]
+            ).values_list("id", flat=True)
+        )
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rnd.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in rnd.sample(
+                    ingredient_ids, ingredients_count
+                )
+            ),
+            ignore_conflicts=True,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rnd.sample(tag_ids, rnd.randint(1, len(tag_ids)))
+            ),
+            ignore_conflicts=True,
+        )
+        recipes = Recipe.objects.filter(id__in=recipe_ids)
+        recipes.update_search_vector()
+        invalidate_recipe_responses(recipes)
+        created += len(recipe_ids)
+    return created
@@ -0,0 +1,317 @@
+import time
+from collections import namedtuple
+
+from api.benchmark import IMAGE, benchmark_database, percentiles, seed
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+Endpoint = namedtuple(
+    "Endpoint",
+    ("name", "method", "path", "data", "max_queries", "paginated", "client"),
+    defaults=(None, 10, False, "user"),
+)
+
+PASSWORD = "benchmark-password"
+RECIPE_LIST_QUERIES = 7
+RECIPE_DETAIL_QUERIES = 5
+
+
+def get_endpoints(state):
+    recipe = state["recipe"]
+    author = state["author"]
+    ingredients = state["ingredients"]
+    tags = state["tags"]
+    recipe_data = {
+        "name": "Рецепт для замера",
+        "text": "Описание",
+        "cooking_time": 10,
+        "image": IMAGE,
+        "tags": tags,
+        "ingredients": [{"id": pk, "amount": 10} for pk in ingredients],
+    }
+    return (
+        Endpoint(
+            "recipes list",
+            "get",
+            "/api/recipes/",
+            max_queries=RECIPE_LIST_QUERIES,
+            paginated=True,
+        ),
+        Endpoint(
+            "recipes list anonymous",
+            "get",
+            "/api/recipes/",
+            max_queries=RECIPE_LIST_QUERIES,
+            paginated=True,
+            client="anonymous",
+        ),
+        Endpoint(
+            "recipes list favorited",
+            "get",
+            "/api/recipes/?is_favorited=1",
+            max_queries=RECIPE_LIST_QUERIES,
+            paginated=True,
+        ),
+        Endpoint(
+            "recipes list by tag",
+            "get",
+            f"/api/recipes/?tags={state['tag_slug']}",
+            max_queries=RECIPE_LIST_QUERIES,
+            paginated=True,
+        ),
+        Endpoint(
+            "recipes cook with",
+            "get",
+            "/api/recipes/cook_with/?ingredients="
+            + ",".join(map(str, ingredients)),
+            max_queries=RECIPE_LIST_QUERIES,
+            paginated=True,
+        ),
+        Endpoint(
+            "recipe detail",
+            "get",
+            f"/api/recipes/{recipe}/",
+            max_queries=RECIPE_DETAIL_QUERIES,
+        ),
+        Endpoint(
+            "recipe create",
+            "post",
+            "/api/recipes/",
+            recipe_data,
+            max_queries=20,
+        ),
+        Endpoint(
+            "recipe update",
+            "patch",
+            lambda: f"/api/recipes/{state['created']}/",
+            recipe_data,
+            max_queries=25,
+        ),
+        Endpoint(
+            "recipe delete",
+            "delete",
+            lambda: f"/api/recipes/{state['created']}/",
+            max_queries=15,
+        ),
+        Endpoint("favorite add", "post", f"/api/recipes/{recipe}/favorite/"),
+        Endpoint(
+            "favorite remove", "delete", f"/api/recipes/{recipe}/favorite/"
+        ),
+        Endpoint(
+            "shopping cart add",
+            "post",
+            f"/api/recipes/{recipe}/shopping_cart/",
+        ),
+        Endpoint(
+            "download shopping cart",
+            "get",
+            "/api/recipes/download_shopping_cart/",
+        ),
+        Endpoint(
+            "shopping cart remove",
+            "delete",
+            f"/api/recipes/{recipe}/shopping_cart/",
+        ),
+        Endpoint("tags list", "get", "/api/tags/", client="anonymous"),
+        Endpoint(
+            "tag detail", "get", f"/api/tags/{tags[0]}/", client="anonymous"
+        ),
+        Endpoint(
+            "ingredients list", "get", "/api/ingredients/", client="anonymous"
+        ),
+        Endpoint(
+            "ingredients search",
+            "get",
+            "/api/ingredients/?name=мол",
+            client="anonymous",
+        ),
+        Endpoint(
+            "ingredient detail",
+            "get",
+            f"/api/ingredients/{ingredients[0]}/",
+            client="anonymous",
+        ),
+        Endpoint(
+            "subscriptions list",
+            "get",
+            "/api/users/subscriptions/",
+            paginated=True,
+        ),
+        Endpoint("subscribe", "post", f"/api/users/{author}/subscribe/"),
+        Endpoint("unsubscribe", "delete", f"/api/users/{author}/subscribe/"),
+        Endpoint("users list", "get", "/api/users/", paginated=True),
+        Endpoint("user detail", "get", f"/api/users/{author}/"),
+        Endpoint("current user", "get", "/api/users/me/"),
+        Endpoint(
+            "set password",
+            "post",
+            "/api/users/set_password/",
+            {"current_password": PASSWORD, "new_password": PASSWORD},
+        ),
+        Endpoint(
+            "token login",
+            "post",
+            "/api/auth/token/login/",
+            {"email": state["email"], "password": PASSWORD},
+            client="anonymous",
+        ),
+        Endpoint(
+            "admin recipes",
+            "get",
+            "/admin/recipes/recipe/",
+            max_queries=15,
+            client="admin",
+        ),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Засевает синтетические данные, вызывает все маршруты API "
+        "и проверяет лимиты количества запросов к базе данных"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--small-page", type=int, default=2)
+        parser.add_argument(
+            "--large-page", type=int, default=settings.MAX_PAGE_SIZE
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options["keepdb"]):
+            if not Recipe.objects.exists():
+                seed(users=options["users"], recipes=options["recipes"])
+            failures = self.run_endpoints(options)
+        if failures:
+            raise CommandError("\n".join(failures))
+
+    def get_clients(self, user):
+        user.set_password(PASSWORD)
+        user.save()
+        token, _ = Token.objects.get_or_create(user=user)
+        authenticated = APIClient()
+        authenticated.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        admin = Client()
+        admin.force_login(
+            User.objects.create_superuser(
+                username="benchmark-admin",
+                email="benchmark-admin@example.com",
+                password=PASSWORD,
+            )
+        )
+        return {
+            "user": authenticated,
+            "anonymous": APIClient(),
+            "admin": admin,
+        }
+
+    def request(self, clients, endpoint, path):
+        client = clients[endpoint.client]
+        kwargs = {} if endpoint.client == "admin" else {"format": "json"}
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, endpoint.method)(
+                path, endpoint.data, **kwargs
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        return response, len(queries), elapsed
+
+    def run_endpoints(self, options):
+        user = User.objects.filter(subscriptions__isnull=False).first()
+        author = (
+            User.objects.exclude(id=user.id).exclude(subscribers=user).first()
+        )
+        recipe = (
+            Recipe.objects.exclude(author=user)
+            .exclude(favorite_recipe=user)
+            .exclude(shopping_cart=user)
+            .first()
+        )
+        state = {
+            "recipe": recipe.id,
+            "author": author.id,
+            "email": user.email,
+            "tags": list(Tag.objects.values_list("id", flat=True)),
+            "tag_slug": Tag.objects.values_list("slug", flat=True)[0],
+            "ingredients": list(
+                Ingredient.objects.values_list("id", flat=True)[:5]
+            ),
+        }
+        clients = self.get_clients(user)
+        failures = []
+        self.stdout.write(
+            "{:<26} {:>7} {:>7} {:>9} {:>9}".format(
+                "endpoint", "queries", "limit", "p50 ms", "p95 ms"
+            )
+        )
+        endpoints = get_endpoints(state)
+        timings = {endpoint.name: [] for endpoint in endpoints}
+        counts = {endpoint.name: 0 for endpoint in endpoints}
+        for _ in range(options["repeat"]):
+            for endpoint in endpoints:
+                path = endpoint.path
+                if callable(path):
+                    path = path()
+                response, count, elapsed = self.request(
+                    clients, endpoint, path
+                )
+                if response.status_code >= 400:
+                    failures.append(
+                        f"{endpoint.name}: HTTP {response.status_code}"
+                    )
+                if endpoint.name == "recipe create":
+                    state["created"] = response.data["id"]
+                timings[endpoint.name].append(elapsed)
+                counts[endpoint.name] = max(counts[endpoint.name], count)
+        for endpoint in endpoints:
+            result = percentiles(timings[endpoint.name])
+            self.stdout.write(
+                "{:<26} {:>7} {:>7} {:>9.2f} {:>9.2f}".format(
+                    endpoint.name,
+                    counts[endpoint.name],
+                    endpoint.max_queries,
+                    result["p50"],
+                    result["p95"],
+                )
+            )
+            if counts[endpoint.name] > endpoint.max_queries:
+                failures.append(
+                    f"{endpoint.name}: {counts[endpoint.name]} queries, "
+                    f"limit {endpoint.max_queries}"
+                )
+            if endpoint.paginated:
+                failures.extend(self.check_scaling(clients, endpoint, options))
+        return sorted(set(failures))
+
+    def check_scaling(self, clients, endpoint, options):
+        separator = "&" if "?" in endpoint.path else "?"
+        small, large = (
+            self.request(
+                clients,
+                endpoint,
+                f"{endpoint.path}{separator}limit={options[size]}",
+            )[1]
+            for size in ("small_page", "large_page")
+        )
+        if small != large:
+            return [
+                f"{endpoint.name}: {small} queries for "
+                f"limit={options['small_page']}, {large} queries for "
+                f"limit={options['large_page']}"
+            ]
+        return []
@@ -0,0 +1,101 @@
+import random
+import time
+
+from api.benchmark import benchmark_database, percentiles, seed
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from recipes.models import Recipe, RecipeIngredient
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+MODES = (
+    ("drf", {"FAST_RECIPE_SERIALIZER": False}),
+    ("fast", {"FAST_RECIPE_SERIALIZER": True}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время ответа подбора рецептов по ингредиентам "
+        "на синтетической базе и сравнивает p95 с бюджетом"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=(1, 3, 5, 10)
+        )
+        parser.add_argument("--budget", type=float, default=50.0)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options["keepdb"]):
+            if not Recipe.objects.exists():
+                seed(users=options["users"], recipes=options["recipes"])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("VACUUM ANALYZE")
+            failures = self.run(options)
+        if failures:
+            raise CommandError("\n".join(failures))
+
+    def run(self, options):
+        client = APIClient()
+        client.force_authenticate(User.objects.first())
+        ingredient_ids = list(
+            RecipeIngredient.objects.order_by()
+            .values_list("ingredient_id", flat=True)
+            .distinct()
+        )
+        self.stdout.write(
+            f"рецептов: {Recipe.objects.count()}, "
+            f"бюджет p95: {options['budget']} мс"
+        )
+        self.stdout.write(
+            "{:<6} {:>11} {:>10} {:>9} {:>9}".format(
+                "mode", "ingredients", "candidates", "p50 ms", "p95 ms"
+            )
+        )
+        failures = []
+        for mode, flags in MODES:
+            with override_settings(**flags):
+                for size in options["sizes"]:
+                    failures.extend(
+                        self.measure(
+                            client, ingredient_ids, mode, size, options
+                        )
+                    )
+        return failures
+
+    def measure(self, client, ingredient_ids, mode, size, options):
+        rnd = random.Random(size)
+        timings = []
+        candidates = 0
+        for _ in range(options["repeat"]):
+            ids = rnd.sample(ingredient_ids, size)
+            path = "/api/recipes/cook_with/?ingredients=" + ",".join(
+                map(str, ids)
+            )
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                return [f"{mode} {size}: HTTP {response.status_code}"]
+            candidates = max(candidates, response.json()["count"])
+        result = percentiles(timings)
+        self.stdout.write(
+            "{:<6} {:>11} {:>10} {:>9.2f} {:>9.2f}".format(
+                mode, size, candidates, result["p50"], result["p95"]
+            )
+        )
+        if result["p95"] > options["budget"]:
+            return [
+                f"{mode} {size}: p95 {result['p95']:.2f} мс, "
+                f"бюджет {options['budget']} мс"
+            ]
+        return []
@@ -0,0 +1,87 @@
+import random
+from types import SimpleNamespace
+
+from api.benchmark import benchmark_database, measure, seed
+from api.views import RecipeViewSet
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db.models import Exists, OuterRef
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+def name_correlated_queryset(user):
+    favorites = user.favorites.values("name")
+    shoping_cart = user.shopping_cart.values("name")
+    subscribes = user.subscriptions.values("username")
+    return Recipe.objects.annotate(
+        is_subscribed=Exists(
+            subscribes.filter(username=OuterRef("author__username"))
+        ),
+        is_favorited=Exists(favorites.filter(name=OuterRef("name"))),
+        is_in_shopping_cart=Exists(shoping_cart.filter(name=OuterRef("name"))),
+    )
+
+
+def id_keyed_queryset(user):
+    view = RecipeViewSet()
+    view.request = SimpleNamespace(user=user)
+    return view.get_queryset()
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время запроса ленты рецептов с флагами "
+        "избранного, корзины и подписок на синтетических данных"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--recipes", type=int, default=100000)
+        parser.add_argument("--viewers", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options["keepdb"]):
+            if not Recipe.objects.exists():
+                seed(users=options["users"], recipes=options["recipes"])
+            viewers = random.Random(0).sample(
+                list(User.objects.values_list("id", flat=True)),
+                options["viewers"],
+            )
+            viewers = list(User.objects.filter(id__in=viewers))
+            for label, get_queryset in (
+                ("name-correlated", name_correlated_queryset),
+                ("id-keyed", id_keyed_queryset),
+            ):
+                for variant, flags in (
+                    ("feed", {}),
+                    ("favorites", {"is_favorited": True}),
+                    ("cart", {"is_in_shopping_cart": True}),
+                ):
+                    timings = measure(
+                        lambda: [
+                            list(
+                                get_queryset(user)
+                                .filter(**flags)
+                                .order_by("-created_at")[
+                                    : settings.POSTS_ON_PAGE
+                                ]
+                            )
+                            for user in viewers
+                        ],
+                        options["repeat"],
+                    )
+                    self.stdout.write(
+                        "{:<16} {:<10} p50 {:>9.2f} ms  p95 {:>9.2f} ms "
+                        "({} viewers)".format(
+                            label,
+                            variant,
+                            timings["p50"],
+                            timings["p95"],
+                            len(viewers),
+                        )
+                    )
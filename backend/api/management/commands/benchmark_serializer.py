@@ -0,0 +1,104 @@
+from api.benchmark import benchmark_database, measure, seed
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import override_settings
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+MODES = (
+    ("drf", {"FAST_RECIPE_SERIALIZER": False}),
+    ("fast", {"FAST_RECIPE_SERIALIZER": True}),
+)
+
+
+def get_paths(state):
+    return (
+        "/api/recipes/",
+        "/api/recipes/?limit={}".format(state["limit"]),
+        "/api/recipes/?page=2",
+        "/api/recipes/?cursor=",
+        "/api/recipes/?tags={}".format(state["tag_slug"]),
+        "/api/recipes/?is_favorited=1",
+        "/api/recipes/?is_in_shopping_cart=1",
+        "/api/recipes/?ordering=-favorites_count",
+        "/api/recipes/?search=1",
+        "/api/recipes/cook_with/?ingredients={}".format(state["ingredients"]),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает ответы списка рецептов в обычном и быстром режиме "
+        "сериализации побайтно и замеряет время ответа"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options["keepdb"]):
+            if not Recipe.objects.exists():
+                seed(users=options["users"], recipes=options["recipes"])
+            failures = self.compare(options)
+        if failures:
+            raise CommandError("\n".join(failures))
+
+    def get_clients(self):
+        user = User.objects.filter(
+            favorites__isnull=False, shopping_cart__isnull=False
+        ).first()
+        authenticated = APIClient()
+        authenticated.force_authenticate(user)
+        return (("anonymous", APIClient()), ("user", authenticated))
+
+    def compare(self, options):
+        state = {
+            "limit": options["limit"],
+            "tag_slug": Tag.objects.values_list("slug", flat=True)[0],
+            "ingredients": ",".join(
+                map(str, Ingredient.objects.values_list("id", flat=True)[:10])
+            ),
+        }
+        failures = []
+        self.stdout.write(
+            "{:<10} {:<55} {:>9} {:>9} {:>7}".format(
+                "client", "path", "drf ms", "fast ms", "speedup"
+            )
+        )
+        for viewer_state in (False, True):
+            for client_name, client in self.get_clients():
+                for path in get_paths(state):
+                    timings = {}
+                    bodies = {}
+                    for mode, overrides in MODES:
+                        with override_settings(
+                            VIEWER_STATE_CACHE=viewer_state, **overrides
+                        ):
+                            response = client.get(path)
+                            bodies[mode] = response.content
+                            timings[mode] = measure(
+                                lambda: client.get(path), options["repeat"]
+                            )["p50"]
+                    label = client_name + ("+state" if viewer_state else "")
+                    if response.status_code != 200:
+                        failures.append(
+                            f"{label} {path}: HTTP {response.status_code}"
+                        )
+                    elif bodies["drf"] != bodies["fast"]:
+                        failures.append(f"{label} {path}: output differs")
+                    self.stdout.write(
+                        "{:<10} {:<55} {:>9.2f} {:>9.2f} {:>6.1f}x".format(
+                            label,
+                            path,
+                            timings["drf"],
+                            timings["fast"],
+                            timings["drf"] / timings["fast"],
+                        )
+                    )
+        return failures
@@ -0,0 +1,214 @@
+from api.benchmark import benchmark_database, seed
+from api.cache import contains, get_viewer_state
+from api.relations import COUNTERS
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import override_settings
+from recipes.models import Recipe
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+RECIPE_RELATIONS = (
+    ("favorites", "favorite"),
+    ("shopping_cart", "shopping_cart"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет добавление и удаление избранного, списка покупок "
+        "и подписок через API: ответы 404 и 400, счётчики рецептов "
+        "и кэш состояния пользователя"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--recipes", type=int, default=100)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options["keepdb"]):
+            if not Recipe.objects.exists():
+                seed(users=options["users"], recipes=options["recipes"])
+            path = (
+                "CTE-запросы" if connection.vendor == "postgresql" else "ORM"
+            )
+            self.stdout.write(f"{connection.vendor}: {path}")
+            self.failures = []
+            with override_settings(VIEWER_STATE_CACHE=True):
+                self.check_recipe_relations()
+                self.check_subscriptions()
+        if self.failures:
+            raise CommandError("\n".join(self.failures))
+
+    def expect(self, name, actual, expected):
+        ok = actual == expected
+        self.stdout.write(f"{name:<44} {'ok' if ok else 'FAIL'}")
+        if not ok:
+            self.failures.append(
+                f"{name}: получено {actual!r}, ожидалось {expected!r}"
+            )
+
+    def check_recipe_relations(self):
+        user = User.objects.first()
+        client = APIClient()
+        client.force_authenticate(user)
+        missing_id = Recipe.objects.aggregate(last=Max("id"))["last"] + 1
+        for attribute, url_name in RECIPE_RELATIONS:
+            through = getattr(User, attribute).through
+            counter = COUNTERS[attribute]
+            recipe = Recipe.objects.exclude(
+                id__in=through.objects.filter(user_id=user.id).values(
+                    "recipe_id"
+                )
+            ).first()
+            url = f"/api/recipes/{recipe.id}/{url_name}/"
+            missing_url = f"/api/recipes/{missing_id}/{url_name}/"
+
+            def get_counter():
+                return getattr(
+                    Recipe.objects.only(counter).get(id=recipe.id), counter
+                )
+
+            def in_viewer_state():
+                return contains(
+                    get_viewer_state(user.id)[attribute], recipe.id
+                )
+
+            def is_stored():
+                return through.objects.filter(
+                    user_id=user.id, recipe_id=recipe.id
+                ).exists()
+
+            count = get_counter()
+            self.expect(
+                f"{attribute}: state before add", in_viewer_state(), False
+            )
+            self.expect(
+                f"{attribute}: add missing recipe",
+                client.post(missing_url).status_code,
+                404,
+            )
+            response = client.post(url)
+            self.expect(f"{attribute}: add", response.status_code, 201)
+            self.expect(
+                f"{attribute}: add response id",
+                response.json().get("id"),
+                recipe.id,
+            )
+            self.expect(f"{attribute}: row after add", is_stored(), True)
+            self.expect(
+                f"{attribute}: counter after add", get_counter(), count + 1
+            )
+            self.expect(
+                f"{attribute}: state after add", in_viewer_state(), True
+            )
+            self.expect(
+                f"{attribute}: add again", client.post(url).status_code, 400
+            )
+            self.expect(
+                f"{attribute}: counter after add again",
+                get_counter(),
+                count + 1,
+            )
+            self.expect(
+                f"{attribute}: remove missing recipe",
+                client.delete(missing_url).status_code,
+                404,
+            )
+            self.expect(
+                f"{attribute}: remove", client.delete(url).status_code, 204
+            )
+            self.expect(f"{attribute}: row after remove", is_stored(), False)
+            self.expect(
+                f"{attribute}: counter after remove", get_counter(), count
+            )
+            self.expect(
+                f"{attribute}: state after remove", in_viewer_state(), False
+            )
+            self.expect(
+                f"{attribute}: remove again",
+                client.delete(url).status_code,
+                400,
+            )
+            self.expect(
+                f"{attribute}: counter after remove again",
+                get_counter(),
+                count,
+            )
+
+    def check_subscriptions(self):
+        user = User.objects.first()
+        client = APIClient()
+        client.force_authenticate(user)
+        through = User.subscriptions.through
+        author = (
+            User.objects.exclude(id=user.id)
+            .exclude(
+                id__in=through.objects.filter(from_user_id=user.id).values(
+                    "to_user_id"
+                )
+            )
+            .first()
+        )
+        missing_id = User.objects.aggregate(last=Max("id"))["last"] + 1
+        url = f"/api/users/{author.id}/subscribe/"
+        missing_url = f"/api/users/{missing_id}/subscribe/"
+
+        def in_viewer_state():
+            return contains(
+                get_viewer_state(user.id)["subscriptions"], author.id
+            )
+
+        def is_stored():
+            return through.objects.filter(
+                from_user_id=user.id, to_user_id=author.id
+            ).exists()
+
+        self.expect("subscriptions: state before", in_viewer_state(), False)
+        self.expect(
+            "subscriptions: subscribe to self",
+            client.post(f"/api/users/{user.id}/subscribe/").status_code,
+            400,
+        )
+        self.expect(
+            "subscriptions: subscribe to missing author",
+            client.post(missing_url).status_code,
+            404,
+        )
+        response = client.post(url)
+        self.expect("subscriptions: subscribe", response.status_code, 201)
+        self.expect(
+            "subscriptions: subscribe response id",
+            response.json().get("id"),
+            author.id,
+        )
+        self.expect("subscriptions: row after subscribe", is_stored(), True)
+        self.expect(
+            "subscriptions: state after subscribe", in_viewer_state(), True
+        )
+        self.expect(
+            "subscriptions: subscribe again",
+            client.post(url).status_code,
+            400,
+        )
+        self.expect(
+            "subscriptions: unsubscribe missing author",
+            client.delete(missing_url).status_code,
+            404,
+        )
+        self.expect(
+            "subscriptions: unsubscribe", client.delete(url).status_code, 204
+        )
+        self.expect("subscriptions: row after unsubscribe", is_stored(), False)
+        self.expect(
+            "subscriptions: state after unsubscribe", in_viewer_state(), False
+        )
+        self.expect(
+            "subscriptions: unsubscribe again",
+            client.delete(url).status_code,
+            400,
+        )
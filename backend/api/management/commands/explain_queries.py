@@ -0,0 +1,175 @@
+import re
+from collections import namedtuple
+from types import SimpleNamespace
+
+from api.benchmark import benchmark_database, seed
+from api.views import RecipeViewSet
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+HotQuery = namedtuple(
+    "HotQuery", ("name", "table", "get_queryset", "vendors"), defaults=(None,)
+)
+
+INDEX_MARKERS = {
+    "postgresql": (
+        "Index Scan",
+        "Index Only Scan",
+        "Bitmap Heap Scan",
+        "Bitmap Index Scan",
+    ),
+    "sqlite": (
+        "USING INDEX",
+        "USING COVERING INDEX",
+        "USING INTEGER PRIMARY KEY",
+        "USING PRIMARY KEY",
+    ),
+}
+
+
+def get_feed(user):
+    view = RecipeViewSet()
+    view.request = SimpleNamespace(user=user)
+    return view.get_queryset().order_by(*RecipeViewSet.ordering)
+
+
+def get_hot_queries(state):
+    user = state["user"]
+    recipe = state["recipe"]
+    page = settings.POSTS_ON_PAGE
+    favorites = User.favorites.through.objects
+    shopping_cart = User.shopping_cart.through.objects
+    subscriptions = User.subscriptions.through.objects
+    return (
+        HotQuery(
+            "recipes feed", "recipes_recipe", lambda: get_feed(user)[:page]
+        ),
+        HotQuery(
+            "recipes by author",
+            "recipes_recipe",
+            lambda: get_feed(user).filter(author_id=state["author"])[:page],
+        ),
+        HotQuery(
+            "recipes by tag",
+            "recipes_recipe_tags",
+            lambda: get_feed(user).filter(tags__slug=state["tag_slug"])[:page],
+        ),
+        HotQuery(
+            "favorite probe",
+            "users_user_favorites",
+            lambda: favorites.filter(user_id=user.id, recipe_id=recipe).values(
+                "id"
+            )[:1],
+        ),
+        HotQuery(
+            "favorites of recipe",
+            "users_user_favorites",
+            lambda: favorites.filter(recipe_id=recipe).values("user_id"),
+        ),
+        HotQuery(
+            "shopping cart probe",
+            "users_user_shopping_cart",
+            lambda: shopping_cart.filter(
+                user_id=user.id, recipe_id=recipe
+            ).values("id")[:1],
+        ),
+        HotQuery(
+            "shopping carts of recipe",
+            "users_user_shopping_cart",
+            lambda: shopping_cart.filter(recipe_id=recipe).values("user_id"),
+        ),
+        HotQuery(
+            "subscriptions of user",
+            "users_user_subscriptions",
+            lambda: subscriptions.filter(from_user_id=user.id).values(
+                "to_user_id"
+            ),
+        ),
+        HotQuery(
+            "subscribers of author",
+            "users_user_subscriptions",
+            lambda: subscriptions.filter(to_user_id=state["author"]).values(
+                "from_user_id"
+            ),
+        ),
+        HotQuery(
+            "ingredient prefix",
+            "recipes_ingredient",
+            lambda: Ingredient.objects.filter(name__startswith="Мол")[
+                : settings.INGREDIENT_SEARCH_LIMIT
+            ],
+            vendors=("postgresql",),
+        ),
+        HotQuery(
+            "ingredient substring",
+            "recipes_ingredient",
+            lambda: Ingredient.objects.filter(name__icontains="моло")[
+                : settings.INGREDIENT_SEARCH_LIMIT
+            ],
+            vendors=("postgresql",),
+        ),
+    )
+
+
+def uses_index(plan, table, vendor):
+    lines = [
+        line for line in plan.splitlines() if re.search(rf"\b{table}\b", line)
+    ]
+    return bool(lines) and all(
+        any(marker in line for marker in INDEX_MARKERS[vendor])
+        for line in lines
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Засевает синтетические данные и проверяет по EXPLAIN, "
+        "что горячие запросы используют индексы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=20000)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in INDEX_MARKERS:
+            raise CommandError(f"EXPLAIN не поддерживается для {vendor}")
+        with benchmark_database(keepdb=options["keepdb"]):
+            if not Recipe.objects.exists():
+                seed(users=options["users"], recipes=options["recipes"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            failures = self.explain(vendor, options["verbosity"])
+        if failures:
+            raise CommandError("\n".join(failures))
+
+    def explain(self, vendor, verbosity):
+        user = User.objects.filter(subscriptions__isnull=False).first()
+        state = {
+            "user": user,
+            "author": user.subscriptions.values_list("id", flat=True)[0],
+            "recipe": user.favorites.values_list("id", flat=True)[0],
+            "tag_slug": Tag.objects.values_list("slug", flat=True)[0],
+        }
+        failures = []
+        for query in get_hot_queries(state):
+            if query.vendors and vendor not in query.vendors:
+                self.stdout.write(f"{query.name:<26} skipped on {vendor}")
+                continue
+            plan = query.get_queryset().explain()
+            ok = uses_index(plan, query.table, vendor)
+            self.stdout.write(
+                f"{query.name:<26} {'index' if ok else 'NO INDEX'}"
+            )
+            if verbosity > 1 or not ok:
+                self.stdout.write(plan)
+            if not ok:
+                failures.append(f"{query.name}: {query.table} without index")
+        return failures
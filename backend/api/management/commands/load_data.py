@@ -1,13 +1,50 @@
-import json
-
-from decouple import config
-from django.core.management import BaseCommand
-from recipes.models import Ingredient
+from api.loaders import (
+    LoaderError,
+    get_default_path,
+    load_ingredients,
+    load_sample_recipes,
+    load_tags,
+)
+from django.core.management import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
+    help = (
+        "Потоково загружает ингредиенты из JSON или CSV пачками без "
+        "дублей, при необходимости добавляет теги и примеры рецептов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--tags", action="store_true")
+        parser.add_argument("--sample-recipes", type=int, default=0)
+
+    def report(self, rows, elapsed):
+        self.stdout.write(
+            f"  {rows} строк, {rows / max(elapsed, 1e-9):.0f} строк/с"
+        )
+
     def handle(self, *args, **options):
-        with open(config("PATH_TO_JSON")) as file:
-            Ingredient.objects.bulk_create(
-                map(lambda x: Ingredient(**x), json.load(file))
-            )
+        try:
+            for path in options["paths"] or [get_default_path()]:
+                self.stdout.write(f"Загрузка ингредиентов из {path}")
+                rows, created = load_ingredients(
+                    path,
+                    options["batch_size"],
+                    progress=(
+                        self.report if options["verbosity"] > 0 else None
+                    ),
+                )
+                self.stdout.write(
+                    f"Прочитано строк: {rows}, новых ингредиентов: {created}"
+                )
+            if options["tags"]:
+                self.stdout.write(f"Новых тегов: {load_tags()}")
+            if options["sample_recipes"]:
+                created = load_sample_recipes(
+                    options["sample_recipes"], options["batch_size"]
+                )
+                self.stdout.write(f"Новых примеров рецептов: {created}")
+        except (LoaderError, OSError) as error:
+            raise CommandError(error)
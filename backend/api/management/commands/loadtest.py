@@ -0,0 +1,178 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from api.benchmark import percentiles
+from django.core.management import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    "/api/recipes/",
+    "/api/tags/",
+    "/api/ingredients/",
+)
+
+
+def parse_target(value):
+    name, separator, url = value.partition("=")
+    parts = urlsplit(url)
+    if not separator or parts.scheme != "http" or not parts.hostname:
+        raise CommandError(
+            f"Цель {value!r} должна иметь вид имя=http://хост:порт"
+        )
+    return name, parts.hostname, parts.port or 80
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection") != "close"
+
+
+async def worker(host, port, requests, index, deadline, timeout, results):
+    connection = None
+    while time.perf_counter() < deadline:
+        path, request = requests[index % len(requests)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), timeout
+                )
+            reader, writer = connection
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(
+                read_response(reader), timeout
+            )
+        except (
+            OSError,
+            ValueError,
+            asyncio.IncompleteReadError,
+            asyncio.TimeoutError,
+        ):
+            status, keep_alive = None, False
+        if status is None or status >= 400:
+            results[path]["errors"] += 1
+        else:
+            results[path]["timings"].append(
+                (time.perf_counter() - start) * 1000
+            )
+        if not keep_alive and connection is not None:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def run_load(host, port, paths, headers, options):
+    requests = [
+        (
+            path,
+            "".join(
+                (
+                    f"GET {path} HTTP/1.1\r\n",
+                    f"Host: {host}:{port}\r\n",
+                    "Accept: application/json\r\n",
+                    *(f"{name}: {value}\r\n" for name, value in headers),
+                    "\r\n",
+                )
+            ).encode(),
+        )
+        for path in paths
+    ]
+    results = {path: {"timings": [], "errors": 0} for path in paths}
+    deadline = time.perf_counter() + options["duration"]
+    await asyncio.gather(
+        *(
+            worker(
+                host,
+                port,
+                requests,
+                index,
+                deadline,
+                options["timeout"],
+                results,
+            )
+            for index in range(options["concurrency"])
+        )
+    )
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает запущенный сервер параллельными соединениями и "
+        "сравнивает пропускную способность, например WSGI и ASGI"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "targets",
+            nargs="+",
+            help="имя=http://хост:порт, например wsgi=http://127.0.0.1:8000",
+        )
+        parser.add_argument("--path", action="append", dest="paths")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--token")
+
+    def handle(self, *args, **options):
+        targets = [parse_target(value) for value in options["targets"]]
+        paths = options["paths"] or DEFAULT_PATHS
+        headers = []
+        if options["token"]:
+            headers.append(("Authorization", f"Token {options['token']}"))
+        self.stdout.write(
+            "{:<8} {:<30} {:>8} {:>7} {:>9} {:>9} {:>9}".format(
+                "target",
+                "path",
+                "requests",
+                "errors",
+                "req/s",
+                "p50 ms",
+                "p95 ms",
+            )
+        )
+        for name, host, port in targets:
+            results = asyncio.run(
+                run_load(host, port, paths, headers, options)
+            )
+            total = 0
+            for path, result in results.items():
+                count = len(result["timings"])
+                total += count
+                timings = percentiles(result["timings"] or [0])
+                self.stdout.write(
+                    "{:<8} {:<30} {:>8} {:>7} {:>9.1f} {:>9.2f} {:>9.2f}".format(
+                        name,
+                        path,
+                        count,
+                        result["errors"],
+                        count / options["duration"],
+                        timings["p50"],
+                        timings["p95"],
+                    )
+                )
+            self.stdout.write(
+                "{:<8} {:<30} {:>8} {:>7} {:>9.1f}".format(
+                    name, "total", total, "", total / options["duration"]
+                )
+            )
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+SETUP_CODE = "import django; django.setup()"
+URLS_CODE = (
+    "; from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает самые медленные модули, импортируемые "
+        "при выполнении django.setup()"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument(
+            "--sort", choices=("self", "cumulative"), default="cumulative"
+        )
+        parser.add_argument(
+            "--with-urls",
+            action="store_true",
+            help="Также импортировать ROOT_URLCONF (представления и т.д.)",
+        )
+
+    def handle(self, *args, **options):
+        code = SETUP_CODE + (URLS_CODE if options["with_urls"] else "")
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "sogustika.settings"
+            ),
+        )
+        result = subprocess.run(
+            (sys.executable, "-X", "importtime", "-c", code),
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            self_time, cumulative, name = line.split(":", 1)[1].split("|")
+            if not self_time.strip().isdigit():
+                continue
+            modules.append((int(self_time), int(cumulative), name.strip()))
+        total = sum(self_time for self_time, _, _ in modules)
+        key = 0 if options["sort"] == "self" else 1
+        modules.sort(key=lambda x: x[key], reverse=True)
+        self.stdout.write(
+            "{:>10} {:>12}  {}".format("self ms", "cumulative ms", "module")
+        )
+        for self_time, cumulative, name in modules[: options["limit"]]:
+            self.stdout.write(
+                "{:>10.2f} {:>12.2f}  {}".format(
+                    self_time / 1000, cumulative / 1000, name
+                )
+            )
+        self.stdout.write(
+            f"Всего модулей: {len(modules)}, время импорта: "
+            f"{total / 1000:.2f} ms"
+        )
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from api.cache import invalidate_viewer_state
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from recipes.models import Recipe, recount_recipe_counters
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет из списков покупок рецепты, добавленные "
+        "раньше указанного количества дней назад"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        stale = User.shopping_cart.through.objects.filter(
+            created_at__lt=cutoff
+        )
+        with transaction.atomic():
+            recipe_ids = list(
+                stale.order_by().values_list("recipe_id", flat=True).distinct()
+            )
+            user_ids = list(
+                stale.order_by().values_list("user_id", flat=True).distinct()
+            )
+            deleted, _ = stale.delete()
+            recount_recipe_counters(Recipe, User, recipe_ids)
+        if settings.VIEWER_STATE_CACHE:
+            invalidate_viewer_state(user_ids)
+        self.stdout.write(f"Удалено записей: {deleted}")
@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from recipes.models import Recipe, recount_recipe_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счетчики избранного, списков покупок "
+        "и ингредиентов рецептов"
+    )
+
+    def handle(self, *args, **options):
+        recount_recipe_counters(Recipe, get_user_model())
+        Recipe.objects.update_ingredients_count()
@@ -1,8 +1,165 @@
+import json
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Field, Func, Q, Value
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 
 
 class Pagination(pagination.PageNumberPagination):
     page_size = settings.POSTS_ON_PAGE
     page_size_query_param = settings.PAGE_SIZE_QUERY_PARAM
     max_page_size = settings.MAX_PAGE_SIZE
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}"
+        for field in ordering
+    )
+
+
+class Row(Func):
+    template = "(%(expressions)s)"
+    output_field = Field()
+
+    def get_group_by_cols(self, alias=None):
+        return [
+            column
+            for expression in self.get_source_expressions()
+            for column in expression.get_group_by_cols()
+        ]
+
+
+def get_position_filter(ordering, position):
+    condition = None
+    for field, value in reversed(tuple(zip(ordering, position))):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        after = Q(**{f"{name}__{lookup}": value})
+        if condition is not None:
+            after |= Q(**{name: value}) & condition
+        condition = after
+    first = ordering[0]
+    lookup = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{lookup}": position[0]}) & condition
+
+
+def filter_by_position(queryset, ordering, position):
+    names = [field.lstrip("-") for field in ordering]
+    fields = [queryset.query.resolve_ref(name).output_field for name in names]
+    position = [
+        field.to_python(value) for field, value in zip(fields, position)
+    ]
+    descending = {field.startswith("-") for field in ordering}
+    if len(descending) > 1:
+        return queryset.filter(get_position_filter(ordering, position))
+    lookup = "lt" if descending.pop() else "gt"
+    return queryset.alias(cursor_position=Row(*map(F, names))).filter(
+        **{
+            f"cursor_position__{lookup}": Row(
+                *(
+                    Value(value, output_field=field)
+                    for field, value in zip(fields, position)
+                )
+            )
+        }
+    )
+
+
+class CursorPagination(pagination.CursorPagination):
+    page_size = settings.POSTS_ON_PAGE
+    page_size_query_param = settings.PAGE_SIZE_QUERY_PARAM
+    max_page_size = settings.MAX_PAGE_SIZE
+    ordering = ("-created_at", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = getattr(view, "cursor_ordering", self.ordering)
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if "id" not in (field.lstrip("-") for field in ordering):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        ordering = (
+            reverse_ordering(self.ordering) if reverse else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = self.filter_after(queryset, ordering, current_position)
+
+        limit = offset + self.page_size + 1
+        results = list(queryset[offset:limit])
+        self.page = results[: self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def filter_after(self, queryset, ordering, position):
+        try:
+            position = json.loads(position)
+            if not isinstance(position, list) or len(position) != len(
+                ordering
+            ):
+                raise ValueError
+            return filter_by_position(queryset, ordering, position)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(
+            [
+                (
+                    instance[field.lstrip("-")]
+                    if isinstance(instance, dict)
+                    else getattr(instance, field.lstrip("-"))
+                )
+                for field in ordering
+            ],
+            default=str,
+        )
+
+
+class CursorPaginationMixin:
+    cursor_pagination_class = CursorPagination
+
+    @property
+    def paginator(self):
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        if (
+            not hasattr(self, "_paginator")
+            and cursor_query_param in self.request.query_params
+        ):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
@@ -0,0 +1,177 @@
+from api.cache import invalidate_viewer_state
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+from recipes.models import RECIPE_COUNTERS, Recipe
+
+User = get_user_model()
+
+COUNTERS = dict(RECIPE_COUNTERS)
+RECIPE_FIELDS = ("id", "name", "image", "image_variants", "cooking_time")
+
+ADD_RECIPE_SQL = """
+WITH recipe AS (
+    SELECT {columns} FROM {recipes} WHERE id = %s
+), inserted AS (
+    INSERT INTO {through} (user_id, recipe_id, created_at)
+    SELECT %s, id, %s FROM recipe
+    ON CONFLICT DO NOTHING
+    RETURNING recipe_id
+), counted AS (
+    UPDATE {recipes} SET {counter} = {counter} + 1
+    WHERE id IN (SELECT recipe_id FROM inserted)
+)
+SELECT recipe.*, EXISTS (SELECT 1 FROM inserted) AS changed FROM recipe
+"""
+REMOVE_RECIPE_SQL = """
+WITH recipe AS (
+    SELECT id FROM {recipes} WHERE id = %s
+), deleted AS (
+    DELETE FROM {through}
+    WHERE user_id = %s AND recipe_id IN (SELECT id FROM recipe)
+    RETURNING recipe_id
+), counted AS (
+    UPDATE {recipes} SET {counter} = {counter} - 1
+    WHERE id IN (SELECT recipe_id FROM deleted)
+)
+SELECT recipe.id, EXISTS (SELECT 1 FROM deleted) AS changed FROM recipe
+"""
+SUBSCRIBE_SQL = """
+WITH author AS (
+    SELECT id FROM {users} WHERE id = %s
+), inserted AS (
+    INSERT INTO {through} (from_user_id, to_user_id, created_at)
+    SELECT %s, id, %s FROM author
+    ON CONFLICT DO NOTHING
+    RETURNING to_user_id
+)
+SELECT author.id, EXISTS (SELECT 1 FROM inserted) AS changed FROM author
+"""
+UNSUBSCRIBE_SQL = """
+WITH author AS (
+    SELECT id FROM {users} WHERE id = %s
+), deleted AS (
+    DELETE FROM {through}
+    WHERE from_user_id = %s AND to_user_id IN (SELECT id FROM author)
+    RETURNING to_user_id
+)
+SELECT author.id, EXISTS (SELECT 1 FROM deleted) AS changed FROM author
+"""
+
+
+def relation_changed(user_id):
+    if settings.VIEWER_STATE_CACHE:
+        transaction.on_commit(lambda: invalidate_viewer_state([user_id]))
+
+
+def format_sql(sql, through, counter=None):
+    quote = connection.ops.quote_name
+    return sql.format(
+        columns=", ".join(map(quote, RECIPE_FIELDS)),
+        recipes=quote(Recipe._meta.db_table),
+        users=quote(User._meta.db_table),
+        through=quote(through._meta.db_table),
+        counter=counter and quote(counter),
+    )
+
+
+def fetch_changed(manager, sql, params):
+    instance = next(iter(manager.raw(sql, params)), None)
+    if instance is not None:
+        instance.changed = bool(instance.changed)
+    return instance
+
+
+def add_recipe(attribute, user_id, recipe_id):
+    through = getattr(User, attribute).through
+    counter = COUNTERS[attribute]
+    if connection.vendor == "postgresql":
+        recipe = fetch_changed(
+            Recipe.objects,
+            format_sql(ADD_RECIPE_SQL, through, counter),
+            (recipe_id, user_id, timezone.now()),
+        )
+    else:
+        with transaction.atomic():
+            recipe = (
+                Recipe.objects.filter(id=recipe_id)
+                .only(*RECIPE_FIELDS)
+                .first()
+            )
+            if recipe is None:
+                return None
+            _, recipe.changed = through.objects.get_or_create(
+                user_id=user_id, recipe_id=recipe_id
+            )
+            if recipe.changed:
+                Recipe.objects.filter(id=recipe_id).change_counter(counter, 1)
+    if recipe is not None and recipe.changed:
+        relation_changed(user_id)
+    return recipe
+
+
+def remove_recipe(attribute, user_id, recipe_id):
+    through = getattr(User, attribute).through
+    counter = COUNTERS[attribute]
+    if connection.vendor == "postgresql":
+        recipe = fetch_changed(
+            Recipe.objects,
+            format_sql(REMOVE_RECIPE_SQL, through, counter),
+            (recipe_id, user_id),
+        )
+        changed = None if recipe is None else recipe.changed
+    else:
+        with transaction.atomic():
+            if not Recipe.objects.filter(id=recipe_id).exists():
+                return None
+            deleted, _ = through.objects.filter(
+                user_id=user_id, recipe_id=recipe_id
+            ).delete()
+            changed = bool(deleted)
+            if changed:
+                Recipe.objects.filter(id=recipe_id).change_counter(counter, -1)
+    if changed:
+        relation_changed(user_id)
+    return changed
+
+
+def subscribe(user_id, author_id):
+    through = User.subscriptions.through
+    if connection.vendor == "postgresql":
+        author = fetch_changed(
+            User.objects,
+            format_sql(SUBSCRIBE_SQL, through),
+            (author_id, user_id, timezone.now()),
+        )
+        changed = None if author is None else author.changed
+    else:
+        if not User.objects.filter(id=author_id).exists():
+            return None
+        _, changed = through.objects.get_or_create(
+            from_user_id=user_id, to_user_id=author_id
+        )
+    if changed:
+        relation_changed(user_id)
+    return changed
+
+
+def unsubscribe(user_id, author_id):
+    through = User.subscriptions.through
+    if connection.vendor == "postgresql":
+        author = fetch_changed(
+            User.objects,
+            format_sql(UNSUBSCRIBE_SQL, through),
+            (author_id, user_id),
+        )
+        changed = None if author is None else author.changed
+    else:
+        if not User.objects.filter(id=author_id).exists():
+            return None
+        deleted, _ = through.objects.filter(
+            from_user_id=user_id, to_user_id=author_id
+        ).delete()
+        changed = bool(deleted)
+    if changed:
+        relation_changed(user_id)
+    return changed
@@ -0,0 +1,33 @@
+from bisect import bisect_left
+
+from api.cache import INGREDIENTS_VERSION, VersionedCache
+from recipes.models import Ingredient
+
+
+def normalize(value):
+    return value.casefold().replace("ё", "е")
+
+
+class IngredientIndex(VersionedCache):
+    version_name = INGREDIENTS_VERSION
+
+    def build(self):
+        items = sorted(
+            Ingredient.objects.values("id", "name", "measurement_unit"),
+            key=lambda x: (normalize(x["name"]), x["id"]),
+        )
+        keys = tuple(normalize(item["name"]) for item in items)
+        return keys, tuple(items)
+
+    def search(self, prefix, limit):
+        keys, items = self.get_state()
+        prefix = normalize(prefix)
+        result = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if len(result) >= limit or not keys[position].startswith(prefix):
+                break
+            result.append(items[position])
+        return result
+
+
+ingredient_index = IngredientIndex()
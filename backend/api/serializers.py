@@ -1,18 +1,46 @@
 import base64
+import binascii
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
 from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template.defaultfilters import filesizeformat
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    get_recipe_prefetches,
+)
+from recipes.storage import image_storage
 from rest_framework import serializers
 
 User = get_user_model()
 
 
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {}
+        for variant, name in value.items():
+            url = image_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant] = url
+        return urls
+
+
 class TagSerializer(serializers.ModelSerializer):
     def to_internal_value(self, data):
-        return data
+        if isinstance(data, bool):
+            data = None
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Ожидается идентификатор тега")
 
     class Meta:
         model = Tag
@@ -40,12 +68,15 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class FavoriteRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
         fields = (
             "id",
             "name",
             "image",
+            "image_variants",
             "cooking_time",
         )
 
@@ -88,6 +119,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 class RecipeSerializer(serializers.ModelSerializer):
     author = serializers.SerializerMethodField()
     image = serializers.ImageField()
+    image_variants = ImageVariantsField()
     ingredients = RecipeIngredientSerializer(
         source="recipe_ingredients", many=True
     )
@@ -99,7 +131,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_author(self, obj):
         serialiser = UserSerializer()
-        obj.author.is_subscribed = obj.is_subscribed
+        obj.author.is_subscribed = getattr(obj, "is_subscribed", False)
         return serialiser.to_representation(obj.author)
 
     class Meta:
@@ -113,25 +145,52 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
         read_only_fields = ("__all__",)
 
 
+class RecipeCoverageSerializer(RecipeSerializer):
+    coverage = serializers.FloatField(read_only=True)
+    ingredients_matched = serializers.IntegerField(read_only=True)
+    ingredients_total = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            "coverage",
+            "ingredients_matched",
+            "ingredients_total",
+        )
+
+
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
+            format, _, imgstr = data.partition(";base64,")
+            if len(imgstr) * 3 // 4 > settings.MAX_IMAGE_UPLOAD_SIZE:
+                raise serializers.ValidationError(
+                    "Размер изображения не должен превышать "
+                    + filesizeformat(settings.MAX_IMAGE_UPLOAD_SIZE)
+                )
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                raise serializers.ValidationError(
+                    "Изображение должно быть закодировано в base64"
+                )
             ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
+            data = ContentFile(content, name="temp." + ext)
         return super().to_internal_value(data)
 
 
 class RecipeIngredientsSerializer(serializers.ModelSerializer):
-    def to_internal_value(self, data):
-        data["ingredient_id"] = data.pop("id")
-        return data
+    id = serializers.IntegerField(source="ingredient_id")
+    amount = serializers.IntegerField(
+        min_value=1,
+        error_messages={"min_value": "Количество должно быть больше нуля"},
+    )
 
     class Meta:
         model = RecipeIngredient
@@ -151,14 +210,38 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         objects_set = map(lambda x: RecipeIngredient(**x), data)
         return RecipeIngredient.objects.bulk_create(objects_set)
 
+    def update_ingredients(self, ingredients, instance):
+        existing = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in instance.recipe_ingredients.all()
+        }
+        to_create = []
+        to_update = []
+        for ingredient in ingredients:
+            recipe_ingredient = existing.pop(ingredient["ingredient_id"], None)
+            if recipe_ingredient is None:
+                to_create.append(ingredient)
+            elif recipe_ingredient.amount != ingredient["amount"]:
+                recipe_ingredient.amount = ingredient["amount"]
+                to_update.append(recipe_ingredient)
+        if existing:
+            RecipeIngredient.objects.filter(
+                id__in=[item.id for item in existing.values()]
+            ).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ("amount",))
+        if to_create:
+            self.set_ingredients(to_create, instance)
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        instance.ingredients.clear()
-        ingredients = validated_data.pop("ingredients")
-        tags = validated_data.pop("tags")
-        instance.tags.set(tags)
-        self.set_ingredients(ingredients, instance)
+        ingredients = validated_data.pop("ingredients", None)
+        tags = validated_data.pop("tags", None)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
+            instance.ingredients_count = len(ingredients)
         return super().update(instance, validated_data)
 
     @transaction.atomic
@@ -168,44 +251,75 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         instance = Recipe.objects.create(
             **validated_data,
             author=self.context.get("request").user,
+            ingredients_count=len(ingredients),
         )
         instance.tags.set(tags)
         self.set_ingredients(ingredients, instance)
         return instance
 
+    def check_ingredients(self, ingredients, errors):
+        if not ingredients:
+            errors["ingredients"] = ["Ингредиенты обязательны"]
+            return
+        ids = [ingredient["ingredient_id"] for ingredient in ingredients]
+        if len(ids) > len(set(ids)):
+            errors["ingredients"] = ["Ингредиенты не должны повторяться"]
+            return
+        existing = Ingredient.objects.in_bulk(ids)
+        if len(existing) < len(ids):
+            errors["ingredients"] = [
+                (
+                    {}
+                    if pk in existing
+                    else {"id": [f"Ингредиента с id={pk} не существует"]}
+                )
+                for pk in ids
+            ]
+
+    def resolve_tags(self, tags, errors):
+        if not tags:
+            errors["tags"] = ["Теги обязательны"]
+            return tags
+        if len(tags) > len(set(tags)):
+            errors["tags"] = ["Теги не должны повторяться"]
+            return tags
+        existing = Tag.objects.in_bulk(tags)
+        missing = [pk for pk in tags if pk not in existing]
+        if missing:
+            errors["tags"] = [
+                f"Тега с id={pk} не существует" for pk in missing
+            ]
+            return tags
+        return [existing[pk] for pk in tags]
+
     def validate(self, data):
         errors = {}
-        if data.get("cooking_time") <= 0:
-            errors[
-                "cooking_time"
-            ] = "Время приготовления должно быть больше нуля"
-        ingredients = data.get("ingredients")
-
-        ids_ingredients = list(
-            map(lambda x: x.get("ingredient_id"), ingredients)
-        )
-        ingredients_error_list = []
-        if len(ids_ingredients) > len(set(ids_ingredients)):
-            ingredients_error_list.append("Ингредиенты не должны повторяться")
-        for ingredient in ingredients:
-            if int(ingredient.get("amount")) <= 0:
-                ingredients_error_list.append(
-                    {
-                        Ingredient.objects.get(
-                            id=ingredient.get("ingredient_id")
-                        ).name: "Количество должно быть больше нуля"
-                    }
-                )
-        if len(ingredients_error_list) > 0:
-            errors["ingredients"] = ingredients_error_list
-        if len(data.get("tags")) <= 0:
-            errors["tags"] = "Теги обязательны\n"
+        cooking_time = data.get("cooking_time")
+        if cooking_time is not None and cooking_time <= 0:
+            errors["cooking_time"] = [
+                "Время приготовления должно быть больше нуля"
+            ]
+        name = data.get("name")
+        if name is not None:
+            recipes = Recipe.objects.filter(
+                author=self.context["request"].user, name=name
+            )
+            if self.instance is not None:
+                recipes = recipes.exclude(id=self.instance.id)
+            if recipes.exists():
+                errors["name"] = ["У вас уже есть рецепт с таким названием"]
+        if "ingredients" in data:
+            self.check_ingredients(data["ingredients"], errors)
+        if "tags" in data:
+            data["tags"] = self.resolve_tags(data["tags"], errors)
         if errors:
-            js = str(errors)
-            print(js)
-            raise serializers.ValidationError(js)
+            raise serializers.ValidationError(errors)
         return data
 
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], *get_recipe_prefetches())
+        return RecipeSerializer(instance, context=self.context).data
+
     class Meta:
         model = Recipe
         fields = (
@@ -220,12 +334,15 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 
 
 class UserRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
         fields = (
             "id",
             "name",
             "image",
+            "image_variants",
             "cooking_time",
         )
 
@@ -233,10 +350,7 @@ class UserRecipeSerializer(serializers.ModelSerializer):
 class SubscriptionsSerializer(UserSerializer):
     recipes = UserRecipeSerializer(read_only=True, many=True)
     is_subscribed = serializers.BooleanField(default=False)
-    recipes_count = serializers.SerializerMethodField()
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
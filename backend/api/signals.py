@@ -0,0 +1,240 @@
+from api.cache import (
+    INGREDIENTS_VERSION,
+    TAGS_VERSION,
+    VIEWER_RELATIONS,
+    bump_version,
+    invalidate_recipe_responses,
+    invalidate_viewer_state,
+)
+from api.images import (
+    delete_orphaned_image,
+    generate_image_variants,
+    get_variant_names,
+)
+from api.tasks import run_in_background
+from api.utils import delete_pdfs
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from recipes.models import (
+    RECIPE_COUNTERS,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+)
+
+User = get_user_model()
+
+VIEWER_THROUGHS = {
+    getattr(User, name).through: name for name in VIEWER_RELATIONS
+}
+COUNTER_FIELDS = {
+    getattr(User, attribute).through: field
+    for attribute, field in RECIPE_COUNTERS
+}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    bump_version(INGREDIENTS_VERSION)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def release_ingredients_count(sender, instance, **kwargs):
+    Recipe.objects.filter(
+        id__in=RecipeIngredient.objects.filter(
+            ingredient_id=instance.id
+        ).values("recipe_id")
+    ).change_counter("ingredients_count", -1)
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(
+            lambda: Recipe.objects.filter(
+                ingredients=instance
+            ).update_search_vector()
+        )
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_version(TAGS_VERSION)
+
+
+@receiver(post_delete, sender=User)
+def delete_shopping_list_pdfs(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: delete_pdfs(user_id))
+
+
+@receiver(m2m_changed, sender=User.favorites.through)
+@receiver(m2m_changed, sender=User.shopping_cart.through)
+def update_recipe_counters(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    field = COUNTER_FIELDS[sender]
+    if action == "post_add":
+        if reverse:
+            recipes = Recipe.objects.filter(id=instance.id)
+            recipes.change_counter(field, len(pk_set))
+        else:
+            Recipe.objects.filter(id__in=pk_set).change_counter(field, 1)
+    elif action == "pre_remove":
+        if reverse:
+            removed = sender.objects.filter(
+                recipe_id=instance.id, user_id__in=pk_set
+            ).count()
+            recipes = Recipe.objects.filter(id=instance.id)
+            recipes.change_counter(field, -removed)
+        else:
+            Recipe.objects.filter(
+                id__in=sender.objects.filter(
+                    user_id=instance.id, recipe_id__in=pk_set
+                ).values("recipe_id")
+            ).change_counter(field, -1)
+    elif action == "pre_clear":
+        if reverse:
+            Recipe.objects.filter(id=instance.id).update(**{field: 0})
+        else:
+            Recipe.objects.filter(
+                id__in=sender.objects.filter(user_id=instance.id).values(
+                    "recipe_id"
+                )
+            ).change_counter(field, -1)
+
+
+@receiver(pre_delete, sender=User)
+def release_recipe_counters(sender, instance, **kwargs):
+    for through, field in COUNTER_FIELDS.items():
+        Recipe.objects.filter(
+            id__in=through.objects.filter(user_id=instance.id).values(
+                "recipe_id"
+            )
+        ).change_counter(field, -1)
+
+
+@receiver(m2m_changed, sender=User.favorites.through)
+@receiver(m2m_changed, sender=User.shopping_cart.through)
+@receiver(m2m_changed, sender=User.subscriptions.through)
+def invalidate_viewer_states(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not settings.VIEWER_STATE_CACHE or action not in (
+        "post_add",
+        "post_remove",
+        "pre_clear",
+    ):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif pk_set is not None:
+        user_ids = list(pk_set)
+    else:
+        owner, target = VIEWER_RELATIONS[VIEWER_THROUGHS[sender]]
+        user_ids = list(
+            sender.objects.filter(**{target: instance.pk}).values_list(
+                owner, flat=True
+            )
+        )
+    transaction.on_commit(lambda: invalidate_viewer_state(user_ids))
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_image_variants(sender, instance, **kwargs):
+    variants = get_variant_names(instance.image.name)
+    if variants and instance.image_variants != variants:
+        run_in_background(
+            generate_image_variants,
+            instance.id,
+            instance.image.name,
+            key=("image_variants", instance.id),
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def reindex_recipe(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: Recipe.objects.filter(id=instance.id).update_search_vector()
+    )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_replaced_image(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old_image = (
+        Recipe.objects.filter(pk=instance.pk)
+        .values_list("image", flat=True)
+        .first()
+    )
+    if old_image and old_image != instance.image.name:
+        instance._replaced_image = old_image
+        instance.image_variants = {}
+
+
+@receiver(post_save, sender=Recipe)
+def delete_replaced_image(sender, instance, **kwargs):
+    old_image = instance.__dict__.pop("_replaced_image", None)
+    if old_image:
+        transaction.on_commit(lambda: delete_orphaned_image(old_image))
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_image(sender, instance, **kwargs):
+    image_name = instance.image.name
+    transaction.on_commit(lambda: delete_orphaned_image(image_name))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(pre_delete, sender=Recipe)
+def invalidate_recipe_cache(sender, instance, **kwargs):
+    invalidate_recipe_responses(Recipe.objects.filter(id=instance.id))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredient_cache(sender, instance, **kwargs):
+    invalidate_recipe_responses(Recipe.objects.filter(id=instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_cache(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        recipes = instance.recipe_set.all()
+        if pk_set is not None:
+            recipes = Recipe.objects.filter(id__in=pk_set)
+        invalidate_recipe_responses(recipes, [instance.slug])
+    else:
+        invalidate_recipe_responses(
+            Recipe.objects.filter(id=instance.id),
+            Tag.objects.filter(id__in=pk_set or ()).values_list(
+                "slug", flat=True
+            ),
+        )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cache(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created or (
+        update_fields is not None
+        and set(update_fields) <= {"last_login", "password"}
+    ):
+        return
+    invalidate_recipe_responses(Recipe.objects.filter(author_id=instance.id))
@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.BACKGROUND_WORKERS,
+    thread_name_prefix="sogustika-background",
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def run_in_background(func, *args, key=None):
+    def task():
+        with _pending_lock:
+            _pending.discard(key)
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+
+    def submit():
+        if key is not None:
+            with _pending_lock:
+                if key in _pending:
+                    return
+                _pending.add(key)
+        executor.submit(task)
+
+    transaction.on_commit(submit)
@@ -1,3 +1,4 @@
+from api.async_views import async_urls
 from api.views import (
     FavoriteViewSet,
     IngredientViewSet,
@@ -22,8 +23,23 @@ router.register(
 router.register("recipes", RecipeViewSet, basename="recipes")
 router.register("ingredients", IngredientViewSet, basename="ingredients")
 router.register("tags", TagViewSet, basename="tags")
+ASYNC_URL_NAMES = {
+    "recipes-list",
+    "recipes-detail",
+    "recipes-cook-with",
+    "recipes-download-shopping-cart",
+    "ingredients-list",
+    "ingredients-detail",
+    "tags-list",
+    "tags-detail",
+    "subscriptions",
+}
 subscribe_urls = [
-    path("subscriptions/", SubscriptionsViewSet.as_view({"get": "list"})),
+    path(
+        "subscriptions/",
+        SubscriptionsViewSet.as_view({"get": "list"}),
+        name="subscriptions",
+    ),
     path(
         "<int:id>/subscribe/",
         SubscriptionsViewSet.as_view(
@@ -33,8 +49,8 @@ subscribe_urls = [
 ]
 
 urlpatterns = [
-    path("users/", include(subscribe_urls)),
-    path("", include(router.urls)),
+    path("users/", include(async_urls(subscribe_urls, ASYNC_URL_NAMES))),
+    path("", include(async_urls(router.urls, ASYNC_URL_NAMES))),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
 ]
@@ -1,21 +1,33 @@
+import csv
+import hashlib
 import io
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
 
+from django.conf import settings
 from django.db.models import Sum
 from recipes.models import RecipeIngredient
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 
-pdfmetrics.registerFont(
-    TTFont("beer-money12", "recipes/fonts/beer-money12.ttf")
-)
-pdfmetrics.registerFont(
-    TTFont(
-        "dewberry-bold-italic.ttf", "recipes/fonts/dewberry-bold-italic.ttf"
-    )
+PDF_LAYOUT_VERSION = 2
+FONTS_DIR = Path(__file__).resolve().parent.parent / "recipes" / "fonts"
+FONTS = (
+    ("beer-money12", "beer-money12.ttf"),
+    ("dewberry-bold-italic.ttf", "dewberry-bold-italic.ttf"),
 )
 
 
+@lru_cache(maxsize=None)
+def register_fonts():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for name, filename in FONTS:
+        pdfmetrics.registerFont(TTFont(name, str(FONTS_DIR / filename)))
+
+
 def get_query(user):
     recipe_ingredient_set = RecipeIngredient.objects.filter(
         recipe_id__in=user.shopping_cart.values("id")
@@ -29,26 +41,112 @@ def get_query(user):
     )
 
 
+def iter_shopping_list(user):
+    for ingredient in get_query(user).iterator():
+        yield (
+            ingredient.get("ingredient__name"),
+            ingredient.get("total"),
+            ingredient.get("ingredient__measurement_unit"),
+        )
+
+
+def get_shopping_list(user):
+    return list(iter_shopping_list(user))
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def stream_txt(shopping_list):
+    for name, amount, unit in shopping_list:
+        yield name + " " + str(amount) + unit + "\n"
+
+
+def stream_csv(shopping_list):
+    writer = csv.writer(Echo())
+    yield writer.writerow(("name", "amount", "measurement_unit"))
+    for row in shopping_list:
+        yield writer.writerow(row)
+
+
+def stream_json(shopping_list):
+    yield "["
+    separator = ""
+    for name, amount, unit in shopping_list:
+        yield separator + json.dumps(
+            {"name": name, "amount": amount, "measurement_unit": unit},
+            ensure_ascii=False,
+        )
+        separator = ","
+    yield "]"
+
+
+SHOPPING_LIST_WRITERS = {
+    "txt": stream_txt,
+    "csv": stream_csv,
+    "json": stream_json,
+}
+
+
+def get_pdf_path(user, shopping_list):
+    digest = hashlib.sha256(
+        json.dumps([PDF_LAYOUT_VERSION, shopping_list]).encode()
+    ).hexdigest()
+    return Path(settings.SHOPPING_LIST_ROOT) / f"{user.pk}-{digest}.pdf"
+
+
+def delete_pdfs(user_id, keep=None):
+    for path in Path(settings.SHOPPING_LIST_ROOT).glob(f"{user_id}-*.pdf"):
+        if path != keep:
+            path.unlink(missing_ok=True)
+
+
+def render_pdf(shopping_list, path):
+    from reportlab.pdfgen import canvas
+
+    register_fonts()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            pdf = canvas.Canvas(file)
+            pdf.setFont("beer-money12", 36)
+            pdf.setTitle("Список покупок")
+            pdf.drawCentredString(300, 750, "Список покупок.")
+            pdf.line(80, 700, 480, 700)
+            pdf.setFont("dewberry-bold-italic.ttf", 20)
+            position_x = 100
+            start_position_y = 650
+            step_position_y = 25
+            bottom_position_y = 50
+            top_position_y = 780
+            for name, amount, unit in shopping_list:
+                if start_position_y < bottom_position_y:
+                    pdf.showPage()
+                    pdf.setFont("dewberry-bold-italic.ttf", 20)
+                    start_position_y = top_position_y
+                ingredient_string = name + " " + str(amount) + unit
+                pdf.drawString(position_x, start_position_y, ingredient_string)
+                start_position_y -= step_position_y
+            pdf.showPage()
+            pdf.save()
+        rendered = open(temp_path, "rb")
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return rendered
+
+
 def get_pdf(user):
-    query = get_query(user)
-    buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer)
-    pdf.setFont("beer-money12", 36)
-    pdf.setTitle("Список покупок")
-    pdf.drawCentredString(300, 750, "Список покупок.")
-    pdf.line(80, 700, 480, 700)
-    pdf.setFont("dewberry-bold-italic.ttf", 20)
-    position_x = 100
-    start_position_y = 650
-    step_position_y = 25
-    for ingredient in query:
-        name = ingredient.get("ingredient__name")
-        amount = ingredient.get("total")
-        unit = ingredient.get("ingredient__measurement_unit")
-        ingredient_string = name + " " + str(amount) + unit
-        pdf.drawString(position_x, start_position_y, ingredient_string)
-        start_position_y -= step_position_y
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
-    return buffer
+    shopping_list = get_shopping_list(user)
+    path = get_pdf_path(user, shopping_list)
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        file = render_pdf(shopping_list, path)
+        delete_pdfs(user.pk, keep=path)
+    with file:
+        return io.BytesIO(file.read())
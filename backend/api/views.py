@@ -1,89 +1,283 @@
-from api.filters import RecipeFilterSet
-from api.pagination import Pagination
+from functools import partial
+
+from api.cache import (
+    INGREDIENTS_VERSION,
+    TAGS_VERSION,
+    ReferenceDataCache,
+    apply_viewer_state,
+    cached_response,
+    get_recipe_detail_key,
+    get_recipe_list_key,
+    get_viewer_state,
+    make_etag,
+)
+from api.fast_serializers import (
+    COVERAGE_FIELDS,
+    FastRecipeSerializer,
+    get_recipe_rows,
+)
+from api.filters import RecipeFilterSet, RecipeOrderingFilter
+from api.pagination import CursorPaginationMixin, Pagination
+from api.relations import add_recipe, remove_recipe, subscribe, unsubscribe
+from api.renderers import (
+    CSVRenderer,
+    PDFRenderer,
+    PlainTextRenderer,
+    render_json,
+)
+from api.search import ingredient_index
 from api.serializers import (
     FavoriteRecipeSerializer,
     IngredientSerializer,
+    RecipeCoverageSerializer,
     RecipeCreateUpdateSerializer,
     RecipeSerializer,
     SubscriptionsSerializer,
     TagSerializer,
 )
-from api.utils import get_pdf
+from api.utils import SHOPPING_LIST_WRITERS, get_pdf, iter_shopping_list
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Exists, OuterRef
-from django.http import FileResponse
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from django_filters import rest_framework as dj_filters
 from recipes.models import Ingredient, Recipe, Tag
-from rest_framework import filters, mixins
+from rest_framework import mixins
 from rest_framework import permissions as drf_permission
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 User = get_user_model()
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+def get_object_id(kwargs):
+    try:
+        return int(kwargs["id"])
+    except ValueError:
+        raise Http404
+
+
+class ReferenceDataViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
-    queryset = Tag.objects.all()
     permission_classes = (drf_permission.AllowAny,)
+    reference_cache = None
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, *self.reference_cache.list())
+
+    def retrieve(self, request, *args, **kwargs):
+        cached = self.reference_cache.detail(kwargs[self.lookup_field])
+        if cached is None:
+            raise Http404
+        return cached_response(request, *cached)
+
+
+class TagViewSet(ReferenceDataViewSet):
+    queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    reference_cache = ReferenceDataCache(TAGS_VERSION, queryset, TagSerializer)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
-    pagination_class = None
+class IngredientViewSet(ReferenceDataViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    permission_classes = (drf_permission.AllowAny,)
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ("^name",)
+    reference_cache = ReferenceDataCache(
+        INGREDIENTS_VERSION, queryset, IngredientSerializer
+    )
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(api_settings.SEARCH_PARAM)
+        if name:
+            return Response(
+                ingredient_index.search(
+                    name, settings.INGREDIENT_SEARCH_LIMIT
+                )
+            )
+        return super().list(request, *args, **kwargs)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     pagination_class = Pagination
     permission_classes = (drf_permission.AllowAny,)
-    filter_backends = (dj_filters.DjangoFilterBackend,)
+    filter_backends = (
+        dj_filters.DjangoFilterBackend,
+        RecipeOrderingFilter,
+    )
     filterset_class = RecipeFilterSet
+    ordering_fields = (
+        "created_at",
+        "pub_date",
+        "favorites_count",
+        "in_carts_count",
+    )
+    ordering = ("-created_at", "-id")
 
     def get_queryset(self):
         user = self.request.user
-        queryset = (
-            Recipe.objects.all()
-            .select_related(
-                "author",
+        queryset = Recipe.objects.defer("search_vector").with_related()
+
+        if user.is_authenticated and not settings.VIEWER_STATE_CACHE:
+            favorites = User.favorites.through.objects.filter(user_id=user.id)
+            shoping_cart = User.shopping_cart.through.objects.filter(
+                user_id=user.id
             )
-            .prefetch_related(
-                "ingredients",
-                "tags",
+            subscribes = User.subscriptions.through.objects.filter(
+                from_user_id=user.id
             )
-        )
-
-        if user.is_authenticated:
-            favorites = user.favorites.values("name")
-            shoping_cart = user.shopping_cart.values("name")
-            subscribes = user.subscriptions.values("username")
             queryset = queryset.annotate(
                 is_subscribed=Exists(
-                    subscribes.filter(username=OuterRef("author__username"))
+                    subscribes.filter(to_user_id=OuterRef("author_id"))
+                ),
+                is_favorited=Exists(
+                    favorites.filter(recipe_id=OuterRef("id"))
                 ),
-                is_favorited=Exists(favorites.filter(name=OuterRef("name"))),
                 is_in_shopping_cart=Exists(
-                    shoping_cart.filter(name=OuterRef("name"))
+                    shoping_cart.filter(recipe_id=OuterRef("id"))
                 ),
             )
         return queryset
 
+    def uses_viewer_state(self):
+        return (
+            settings.VIEWER_STATE_CACHE and self.request.user.is_authenticated
+        )
+
+    def get_response_cache_key(self, request):
+        if (
+            not settings.ANONYMOUS_RECIPE_CACHE
+            or request.user.is_authenticated
+            or request.accepted_renderer.format != "json"
+        ):
+            return None
+        if self.action == "list":
+            return get_recipe_list_key(request)
+        if self.action == "retrieve":
+            return get_recipe_detail_key(
+                request, self.kwargs[self.lookup_field]
+            )
+        return None
+
+    def cache_response(self, request, get_response):
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return get_response()
+        cached = cache.get(key)
+        if cached is None:
+            response = get_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            if isinstance(response, Response):
+                body = render_json(response.data)
+            else:
+                body = response.content
+            cached = (body, make_etag(body))
+            cache.set(key, cached, settings.ANONYMOUS_RECIPE_CACHE_TIMEOUT)
+        return cached_response(request, *cached)
+
+    def list(self, request, *args, **kwargs):
+        return self.cache_response(
+            request, partial(self.render_list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cache_response(
+            request, partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    def render_list(self, request, *args, **kwargs):
+        if (
+            not settings.FAST_RECIPE_SERIALIZER
+            or request.accepted_renderer.format != "json"
+        ):
+            return super().list(request, *args, **kwargs)
+        rows = self.paginator.paginate_queryset(
+            get_recipe_rows(self.filter_queryset(self.get_queryset())),
+            request,
+            view=self,
+        )
+        serializer = FastRecipeSerializer(
+            request,
+            viewer_state=(
+                get_viewer_state(request.user.id)
+                if self.uses_viewer_state()
+                else None
+            ),
+            extra_fields=COVERAGE_FIELDS if self.action == "cook_with" else (),
+        )
+        data = self.paginator.get_paginated_response(
+            serializer.serialize(rows)
+        ).data
+        return HttpResponse(render_json(data), content_type="application/json")
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.uses_viewer_state():
+            apply_viewer_state(page, self.request.user.id)
+        return page
+
+    def get_object(self):
+        recipe = super().get_object()
+        if self.uses_viewer_state():
+            apply_viewer_state([recipe], self.request.user.id)
+        return recipe
+
     @action(
         methods=("get",),
         detail=False,
         permission_classes=(drf_permission.IsAuthenticated,),
+        renderer_classes=(
+            PDFRenderer,
+            PlainTextRenderer,
+            CSVRenderer,
+            JSONRenderer,
+        ),
     )
     def download_shopping_cart(self, request, *args, **kwargs):
-        return FileResponse(
-            get_pdf(self.request.user),
-            as_attachment=True,
-            filename="shopping-list.pdf",
+        renderer = request.accepted_renderer
+        if renderer.format == PDFRenderer.format:
+            return FileResponse(
+                get_pdf(self.request.user),
+                as_attachment=True,
+                filename="shopping-list.pdf",
+            )
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += "; charset=" + renderer.charset
+        response = StreamingHttpResponse(
+            SHOPPING_LIST_WRITERS[renderer.format](
+                iter_shopping_list(self.request.user)
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping-list.{renderer.format}"'
         )
+        return response
+
+    @action(methods=("get",), detail=False)
+    def cook_with(self, request, *args, **kwargs):
+        if not request.query_params.get("ingredients"):
+            raise ValidationError(
+                {"ingredients": ["Укажите id ингредиентов через запятую."]}
+            )
+        return self.list(request, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.action in (
@@ -92,6 +286,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             "partial_update",
         ):
             return RecipeCreateUpdateSerializer
+        if self.action == "cook_with":
+            return RecipeCoverageSerializer
         return RecipeSerializer
 
 
@@ -102,9 +298,13 @@ class BaseFavoriteRecipeShopingCartViewSet(
     serializer_class = FavoriteRecipeSerializer
 
     def create(self, request, *args, **kwargs):
-        id = kwargs.pop("id")
-        recipe = Recipe.objects.get(id=id)
-        getattr(request.user, self.attribute).add(recipe)
+        recipe = add_recipe(
+            self.attribute, request.user.id, get_object_id(kwargs)
+        )
+        if recipe is None:
+            raise Http404
+        if not recipe.changed:
+            raise ValidationError({"errors": self.already_added_message})
         serializer = FavoriteRecipeSerializer(recipe)
         return Response(
             serializer.data,
@@ -113,31 +313,50 @@ class BaseFavoriteRecipeShopingCartViewSet(
 
     @action(methods=["delete"], detail=False)
     def delete(self, request, *args, **kwargs):
-        id = kwargs.pop("id")
-        recipe = Recipe.objects.get(id=id)
-        getattr(request.user, self.attribute).remove(recipe)
+        changed = remove_recipe(
+            self.attribute, request.user.id, get_object_id(kwargs)
+        )
+        if changed is None:
+            raise Http404
+        if not changed:
+            raise ValidationError({"errors": self.not_added_message})
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class FavoriteViewSet(BaseFavoriteRecipeShopingCartViewSet):
     attribute = "favorites"
+    already_added_message = "Рецепт уже в избранном"
+    not_added_message = "Рецепта нет в избранном"
 
 
 class ShoppingCartViewSet(BaseFavoriteRecipeShopingCartViewSet):
     attribute = "shopping_cart"
+    already_added_message = "Рецепт уже в списке покупок"
+    not_added_message = "Рецепта нет в списке покупок"
 
 
-class SubscriptionsViewSet(viewsets.ModelViewSet):
+class SubscriptionsViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     permission_classes = (drf_permission.IsAuthenticated,)
     pagination_class = Pagination
+    cursor_ordering = ("-subscribed_at", "-id")
     serializer_class = SubscriptionsSerializer
 
     @action(detail=True)
     def subscribe(self, request, id):
-        subscribed = User.objects.get(id=id)
-        request.user.subscriptions.add(subscribed)
-        subscribed.is_subscribed = True
-        serializer = SubscriptionsSerializer(subscribed)
+        if id == request.user.id:
+            raise ValidationError(
+                {"errors": "Нельзя подписаться на самого себя"}
+            )
+        changed = subscribe(request.user.id, id)
+        if changed is None:
+            raise Http404
+        if not changed:
+            raise ValidationError(
+                {"errors": "Вы уже подписаны на этого автора"}
+            )
+        serializer = self.get_serializer(
+            self.annotate_authors(User.objects.filter(id=id)).get()
+        )
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED,
@@ -145,18 +364,56 @@ class SubscriptionsViewSet(viewsets.ModelViewSet):
 
     @action(detail=True)
     def unsubscribe(self, request, id):
-        subscribed = User.objects.get(id=id)
-        request.user.subscriptions.remove(subscribed)
+        changed = unsubscribe(request.user.id, id)
+        if changed is None:
+            raise Http404
+        if not changed:
+            raise ValidationError(
+                {"errors": "Вы не подписаны на этого автора"}
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def get_queryset(self):
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get("recipes_limit")
+        if recipes_limit is None:
+            return None
+        try:
+            recipes_limit = int(recipes_limit)
+        except ValueError:
+            recipes_limit = -1
+        if recipes_limit < 0:
+            raise ValidationError(
+                {"recipes_limit": "Должно быть целым неотрицательным числом"}
+            )
+        return recipes_limit
+
+    def annotate_authors(self, queryset):
         user = self.request.user
-        queryset = User.objects.filter(subscriptions__id=user.id).annotate(
+        recipes = Recipe.objects.order_by("-created_at")
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.filter(
+                id__in=Subquery(
+                    Recipe.objects.filter(author_id=OuterRef("author_id"))
+                    .order_by("-created_at")
+                    .values("id")[:recipes_limit]
+                )
+            )
+        return queryset.annotate(
             recipes_count=Count("recipes"),
             is_subscribed=Exists(
-                user.subscriptions.through.objects.filter(
-                    from_user_id=OuterRef("id"),
+                User.subscriptions.through.objects.filter(
+                    from_user_id=user.id,
+                    to_user_id=OuterRef("id"),
                 )
             ),
+        ).prefetch_related(Prefetch("recipes", queryset=recipes))
+
+    def get_queryset(self):
+        return self.annotate_authors(
+            User.objects.filter(
+                subscriber_set__from_user_id=self.request.user.id
+            )
+            .annotate(subscribed_at=F("subscriber_set__created_at"))
+            .order_by(*self.cursor_ordering)
         )
-        return queryset
@@ -1,9 +1,6 @@
 from django.contrib import admin
-from django.contrib.auth import get_user_model
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 
-User = get_user_model()
-
 
 class IngredientInline(admin.TabularInline):
     model = Ingredient
@@ -52,10 +49,23 @@ class RecipeAdmin(admin.ModelAdmin):
         "tags",
     )
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("author")
+            .prefetch_related("tags")
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        Recipe.objects.filter(id=form.instance.id).update_ingredients_count()
+
     def get_favorited_count(self, recipe):
-        return User.objects.filter(favorites=recipe).count()
+        return recipe.favorites_count
 
     get_favorited_count.__name__ = "добавлен в избранное"
+    get_favorited_count.admin_order_field = "favorites_count"
 
     def get_tags(self, recipe):
         recipe_tags = recipe.tags.all()
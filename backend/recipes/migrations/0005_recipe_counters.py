@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-18 13:35
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ("favorites", "favorites_count"),
+    ("shopping_cart", "in_carts_count"),
+)
+
+
+def recount(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    User = apps.get_model("users", "User")
+    for attribute, field in COUNTERS:
+        through = getattr(User, attribute).through
+        Recipe.objects.update(
+            **{
+                field: Coalesce(
+                    models.Subquery(
+                        through.objects.filter(recipe_id=models.OuterRef("id"))
+                        .order_by()
+                        .values("recipe_id")
+                        .annotate(total=models.Count("id"))
+                        .values("total")
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0004_auto_20230804_1647"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="добавлен в избранное"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="in_carts_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="добавлен в списки покупок",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-favorites_count"], name="recipe_favorites_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-in_carts_count"], name="recipe_in_carts_count_idx"
+            ),
+        ),
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 13:39
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0007_recipe_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                default=None,
+                null=True,
+                storage=recipes.storage.get_image_storage,
+                upload_to="recipes/images/",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2 on 2026-10-18 13:40
+
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+SEARCH_CONFIG = "russian"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX recipe_search_vector_idx ON recipes_recipe "
+        "USING gin (search_vector)"
+    )
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    ingredient_names = (
+        RecipeIngredient.objects.filter(recipe_id=models.OuterRef("id"))
+        .order_by()
+        .values("recipe_id")
+        .annotate(names=StringAgg("ingredient__name", " "))
+        .values("names")
+    )
+    Recipe.objects.update(
+        search_vector=(
+            SearchVector("name", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+            + SearchVector(
+                models.Subquery(ingredient_names),
+                weight="C",
+                config=SEARCH_CONFIG,
+            )
+        )
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS recipe_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0008_recipe_image_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.2 on 2026-10-18 13:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0010_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="recipeingredient",
+            options={"ordering": ("recipe_id", "id")},
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    duplicates = (
+        Ingredient.objects.order_by()
+        .values("name", "measurement_unit")
+        .annotate(keep_id=models.Min("id"), total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        keep_id = duplicate.pop("keep_id")
+        duplicate.pop("total")
+        duplicate_ids = list(
+            Ingredient.objects.filter(**duplicate)
+            .exclude(id=keep_id)
+            .values_list("id", flat=True)
+        )
+        recipe_ids = set(
+            RecipeIngredient.objects.filter(ingredient_id=keep_id).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        to_delete = []
+        to_update = []
+        for row in RecipeIngredient.objects.filter(
+            ingredient_id__in=duplicate_ids
+        ).order_by("id"):
+            if row.recipe_id in recipe_ids:
+                to_delete.append(row.id)
+            else:
+                recipe_ids.add(row.recipe_id)
+                to_update.append(row.id)
+        RecipeIngredient.objects.filter(id__in=to_delete).delete()
+        RecipeIngredient.objects.filter(id__in=to_update).update(
+            ingredient_id=keep_id
+        )
+        Ingredient.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0011_recipe_ingredient_ordering"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="ingredient",
+            constraint=models.UniqueConstraint(
+                fields=("name", "measurement_unit"),
+                name="ingredient_name_unit_uniq",
+            ),
+        ),
+    ]
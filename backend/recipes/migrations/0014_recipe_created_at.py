@@ -0,0 +1,78 @@
+# Generated by Django 3.2 on 2026-10-18 14:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_pub_date(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Recipe.objects.update(created_at=models.F("pub_date"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0013_ingredient_name_unit_uniq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name="recipe",
+            options={
+                "ordering": ("-created_at",),
+                "verbose_name": "рецепт",
+                "verbose_name_plural": "рецепты",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="recipe",
+            name="recipe_pub_date_id_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="recipe",
+            name="recipe_author_pub_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="recipe",
+            name="recipe_favorites_count_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="recipe",
+            name="recipe_in_carts_count_idx",
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="recipe_created_at_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-created_at", "-id"],
+                name="recipe_author_created_at_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-favorites_count", "-id"],
+                name="recipe_favorites_count_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-in_carts_count", "-id"],
+                name="recipe_in_carts_count_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 15:05
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_ingredients(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    Recipe.objects.update(
+        ingredients_count=Coalesce(
+            models.Subquery(
+                RecipeIngredient.objects.filter(
+                    recipe_id=models.OuterRef("id")
+                )
+                .order_by()
+                .values("recipe_id")
+                .annotate(total=models.Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0014_recipe_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="ingredients_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="количество ингредиентов",
+            ),
+        ),
+        migrations.RunPython(count_ingredients, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="recipeingredient",
+            index=models.Index(
+                fields=["ingredient", "recipe"],
+                name="recipe_ingredient_lookup_idx",
+            ),
+        ),
+    ]
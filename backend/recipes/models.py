@@ -1,4 +1,59 @@
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models.functions import Coalesce
+from recipes.storage import get_image_storage
+
+SEARCH_CONFIG = "russian"
+RECIPE_COUNTERS = (
+    ("favorites", "favorites_count"),
+    ("shopping_cart", "in_carts_count"),
+)
+
+
+def recount_recipe_counters(recipe_model, user_model, recipe_ids=None):
+    recipes = recipe_model.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(id__in=recipe_ids)
+    for attribute, field in RECIPE_COUNTERS:
+        through = getattr(user_model, attribute).through
+        recipes.update(
+            **{
+                field: Coalesce(
+                    models.Subquery(
+                        through.objects.filter(recipe_id=models.OuterRef("id"))
+                        .order_by()
+                        .values("recipe_id")
+                        .annotate(total=models.Count("id"))
+                        .values("total")
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+def update_search_vectors(queryset, recipe_ingredient_model):
+    if connections[queryset.db].vendor != "postgresql":
+        return 0
+    ingredient_names = (
+        recipe_ingredient_model.objects.filter(recipe_id=models.OuterRef("id"))
+        .order_by()
+        .values("recipe_id")
+        .annotate(names=StringAgg("ingredient__name", " "))
+        .values("names")
+    )
+    return queryset.update(
+        search_vector=(
+            SearchVector("name", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+            + SearchVector(
+                models.Subquery(ingredient_names),
+                weight="C",
+                config=SEARCH_CONFIG,
+            )
+        )
+    )
 
 
 class Ingredient(models.Model):
@@ -6,6 +61,19 @@ class Ingredient(models.Model):
     measurement_unit = models.CharField(max_length=200)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["name"],
+                name="ingredient_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"],
+                name="ingredient_name_unit_uniq",
+            ),
+        ]
         verbose_name_plural = "ингредиенты"
         verbose_name = "игредиент"
         ordering = ("name",)
@@ -36,8 +104,38 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def change_counter(self, field, delta):
+        return self.update(**{field: models.F(field) + delta})
+
+    def update_ingredients_count(self):
+        return self.update(
+            ingredients_count=Coalesce(
+                models.Subquery(
+                    RecipeIngredient.objects.filter(
+                        recipe_id=models.OuterRef("id")
+                    )
+                    .order_by()
+                    .values("recipe_id")
+                    .annotate(total=models.Count("id"))
+                    .values("total")
+                ),
+                0,
+            )
+        )
+
+    def update_search_vector(self):
+        return update_search_vectors(self, RecipeIngredient)
+
+    def with_related(self):
+        return self.select_related("author").prefetch_related(
+            *get_recipe_prefetches()
+        )
+
+
 class Recipe(models.Model):
     pub_date = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
     tags = models.ManyToManyField(Tag)
     author = models.ForeignKey(
         "users.User",
@@ -53,13 +151,56 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to="recipes/images/",
+        storage=get_image_storage,
         null=True,
         default=None,
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField()
     cooking_time = models.PositiveIntegerField()
+    favorites_count = models.PositiveIntegerField(
+        "добавлен в избранное",
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        "добавлен в списки покупок",
+        default=0,
+        editable=False,
+    )
+    ingredients_count = models.PositiveIntegerField(
+        "количество ингредиентов",
+        default=0,
+        editable=False,
+    )
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="recipe_created_at_id_idx",
+            ),
+            models.Index(
+                fields=["author", "-created_at", "-id"],
+                name="recipe_author_created_at_idx",
+            ),
+            models.Index(
+                fields=["-favorites_count", "-id"],
+                name="recipe_favorites_count_idx",
+            ),
+            models.Index(
+                fields=["-in_carts_count", "-id"],
+                name="recipe_in_carts_count_idx",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(cooking_time__gte=1),
@@ -71,7 +212,7 @@ class Recipe(models.Model):
         ]
         verbose_name_plural = "рецепты"
         verbose_name = "рецепт"
-        ordering = ("-pub_date",)
+        ordering = ("-created_at",)
 
     def __str__(self):
         return (
@@ -107,7 +248,13 @@ class RecipeIngredient(models.Model):
                 name="no_double_ingredient", fields=["recipe", "ingredient"]
             ),
         ]
-        ordering = ("recipe",)
+        indexes = [
+            models.Index(
+                fields=["ingredient", "recipe"],
+                name="recipe_ingredient_lookup_idx",
+            ),
+        ]
+        ordering = ("recipe_id", "id")
 
     def __str__(self):
         return (
@@ -118,3 +265,13 @@ class RecipeIngredient(models.Model):
             + str("amoumt")
             + self.ingredient.measurement_unit
         )
+
+
+def get_recipe_prefetches():
+    return (
+        models.Prefetch(
+            "recipe_ingredients",
+            queryset=RecipeIngredient.objects.select_related("ingredient"),
+        ),
+        "tags",
+    )
@@ -17,6 +17,9 @@ AUTH_USER_MODEL = "users.User"
 POSTS_ON_PAGE = 10
 PAGE_SIZE_QUERY_PARAM = "limit"
 MAX_PAGE_SIZE = 100
+INGREDIENT_SEARCH_LIMIT = config(
+    "INGREDIENT_SEARCH_LIMIT", default=50, cast=int
+)
 
 
 INSTALLED_APPS = [
@@ -26,6 +29,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework.authtoken",
     "rest_framework",
     "djoser",
@@ -66,6 +70,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "sogustika.wsgi.application"
+ASGI_APPLICATION = "sogustika.asgi.application"
 
 
 DATABASES = {
@@ -79,6 +84,48 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="sogustika"),
+    },
+    "versions": {
+        "BACKEND": config(
+            "VERSION_CACHE_BACKEND",
+            default="django.core.cache.backends.db.DatabaseCache",
+        ),
+        "LOCATION": config(
+            "VERSION_CACHE_LOCATION", default="sogustika_cache_versions"
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 1000000},
+    },
+    "viewer_state": {
+        "BACKEND": config(
+            "VIEWER_STATE_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config(
+            "VIEWER_STATE_CACHE_LOCATION", default="sogustika-viewer-state"
+        ),
+        "TIMEOUT": config("VIEWER_STATE_TIMEOUT", default=600, cast=int),
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+VIEWER_STATE_CACHE = config("VIEWER_STATE_CACHE", default=False, cast=bool)
+FAST_RECIPE_SERIALIZER = config(
+    "FAST_RECIPE_SERIALIZER", default=False, cast=bool
+)
+ANONYMOUS_RECIPE_CACHE = config(
+    "ANONYMOUS_RECIPE_CACHE", default=False, cast=bool
+)
+ANONYMOUS_RECIPE_CACHE_TIMEOUT = config(
+    "ANONYMOUS_RECIPE_CACHE_TIMEOUT", default=300, cast=int
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -111,6 +158,20 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "collected_static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = config("MEDIA_ROOT", default=BASE_DIR / "media")
+MAX_IMAGE_UPLOAD_SIZE = config(
+    "MAX_IMAGE_UPLOAD_SIZE", default=5 * 1024 * 1024, cast=int
+)
+IMAGE_VARIANTS = {
+    "thumbnail": (240, 240),
+    "card": (720, 720),
+}
+IMAGE_VARIANT_QUALITY = 80
+SHOPPING_LIST_ROOT = config(
+    "SHOPPING_LIST_ROOT", default=BASE_DIR / "shopping_lists"
+)
+BACKGROUND_WORKERS = config("BACKGROUND_WORKERS", default=2, cast=int)
+ASYNC_READ_VIEWS = config("ASYNC_READ_VIEWS", default=False, cast=bool)
+ASYNC_VIEW_WORKERS = config("ASYNC_VIEW_WORKERS", default=8, cast=int)
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-18 13:45
+
+from django.db import migrations
+
+REVERSE_INDEXES = (
+    (
+        "users_user_favorites",
+        "favorite_recipe_user_idx",
+        "recipe_id, user_id",
+    ),
+    (
+        "users_user_shopping_cart",
+        "cart_recipe_user_idx",
+        "recipe_id, user_id",
+    ),
+    (
+        "users_user_subscriptions",
+        "subscription_to_from_idx",
+        "to_user_id, from_user_id",
+    ),
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f"CREATE INDEX {name} ON {table} ({columns})",
+            f"DROP INDEX {name}",
+        )
+        for table, name, columns in REVERSE_INDEXES
+    ]
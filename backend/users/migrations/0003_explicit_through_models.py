@@ -0,0 +1,242 @@
+# Generated by Django 3.2 on 2026-10-18 13:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def through_state(model_name, table, fields, related_names=(None, None)):
+    return migrations.CreateModel(
+        name=model_name,
+        fields=[
+            (
+                "id",
+                models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name="ID",
+                ),
+            ),
+        ]
+        + [
+            (
+                name,
+                models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name=related_name,
+                    to=to,
+                ),
+            )
+            for (name, to), related_name in zip(fields, related_names)
+        ],
+        options={
+            "db_table": table,
+            "unique_together": {tuple(name for name, _ in fields)},
+        },
+    )
+
+
+def through_operations(model_name, fields, verbose_name, unique_name):
+    return [
+        migrations.AddField(
+            model_name=model_name,
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name=verbose_name,
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(name=model_name, unique_together=set()),
+        migrations.AddConstraint(
+            model_name=model_name,
+            constraint=models.UniqueConstraint(
+                fields=list(fields), name=unique_name
+            ),
+        ),
+    ]
+
+
+def unindexed_fk(to, related_name=None):
+    return models.ForeignKey(
+        db_index=False,
+        on_delete=django.db.models.deletion.CASCADE,
+        related_name=related_name,
+        to=to,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0010_hot_path_indexes"),
+        ("users", "0002_through_reverse_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                through_state(
+                    "Favorite",
+                    "users_user_favorites",
+                    (
+                        ("user", settings.AUTH_USER_MODEL),
+                        ("recipe", "recipes.recipe"),
+                    ),
+                ),
+                through_state(
+                    "ShoppingCart",
+                    "users_user_shopping_cart",
+                    (
+                        ("user", settings.AUTH_USER_MODEL),
+                        ("recipe", "recipes.recipe"),
+                    ),
+                ),
+                through_state(
+                    "Subscription",
+                    "users_user_subscriptions",
+                    (
+                        ("from_user", settings.AUTH_USER_MODEL),
+                        ("to_user", settings.AUTH_USER_MODEL),
+                    ),
+                    ("subscription_set", "subscriber_set"),
+                ),
+                migrations.AlterField(
+                    model_name="user",
+                    name="favorites",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        default=False,
+                        related_name="favorite_recipe",
+                        through="users.Favorite",
+                        to="recipes.Recipe",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="user",
+                    name="shopping_cart",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        default=False,
+                        related_name="shopping_cart",
+                        through="users.ShoppingCart",
+                        to="recipes.Recipe",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="user",
+                    name="subscriptions",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        default=False,
+                        related_name="subscribers",
+                        through="users.Subscription",
+                        through_fields=("from_user", "to_user"),
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        *through_operations(
+            "favorite",
+            ("user", "recipe"),
+            "добавлен",
+            "users_favorites_user_recipe_uniq",
+        ),
+        *through_operations(
+            "shoppingcart",
+            ("user", "recipe"),
+            "добавлен",
+            "users_cart_user_recipe_uniq",
+        ),
+        *through_operations(
+            "subscription",
+            ("from_user", "to_user"),
+            "подписан",
+            "users_subscriptions_from_to_uniq",
+        ),
+        migrations.AlterField(
+            model_name="favorite",
+            name="user",
+            field=unindexed_fk(settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name="favorite",
+            name="recipe",
+            field=unindexed_fk("recipes.recipe"),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcart",
+            name="user",
+            field=unindexed_fk(settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcart",
+            name="recipe",
+            field=unindexed_fk("recipes.recipe"),
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="from_user",
+            field=unindexed_fk(settings.AUTH_USER_MODEL, "subscription_set"),
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="to_user",
+            field=unindexed_fk(settings.AUTH_USER_MODEL, "subscriber_set"),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="favorite",
+                    index=models.Index(
+                        fields=["recipe", "user"],
+                        name="favorite_recipe_user_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="shoppingcart",
+                    index=models.Index(
+                        fields=["recipe", "user"],
+                        name="cart_recipe_user_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="subscription",
+                    index=models.Index(
+                        fields=["to_user", "from_user"],
+                        name="subscription_to_from_idx",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="shoppingcart",
+            index=models.Index(
+                fields=["created_at"], name="cart_created_at_idx"
+            ),
+        ),
+        migrations.AlterModelOptions(
+            name="favorite",
+            options={
+                "verbose_name": "избранный рецепт",
+                "verbose_name_plural": "избранное",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="shoppingcart",
+            options={
+                "verbose_name": "рецепт в списке покупок",
+                "verbose_name_plural": "списки покупок",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="subscription",
+            options={
+                "verbose_name": "подписка",
+                "verbose_name_plural": "подписки",
+            },
+        ),
+    ]
@@ -20,14 +20,115 @@ class User(AbstractUser):
         verbose_name="фамилия",
     )
     favorites = models.ManyToManyField(
-        Recipe, blank=True, default=False, related_name="favorite_recipe"
+        Recipe,
+        through="Favorite",
+        blank=True,
+        default=False,
+        related_name="favorite_recipe",
     )
     subscriptions = models.ManyToManyField(
-        "self", blank=True, default=False, related_name="subscriptions"
+        "self",
+        through="Subscription",
+        through_fields=("from_user", "to_user"),
+        symmetrical=False,
+        blank=True,
+        default=False,
+        related_name="subscribers",
     )
     shopping_cart = models.ManyToManyField(
-        Recipe, blank=True, default=False, related_name="shopping_cart"
+        Recipe,
+        through="ShoppingCart",
+        blank=True,
+        default=False,
+        related_name="shopping_cart",
     )
 
     def __str__(self):
         return self.username
+
+
+class UserRecipe(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, db_index=False
+    )
+    created_at = models.DateTimeField("добавлен", auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.user} {self.recipe.name}"
+
+
+class Favorite(UserRecipe):
+    class Meta:
+        db_table = "users_user_favorites"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="users_favorites_user_recipe_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"],
+                name="favorite_recipe_user_idx",
+            ),
+        ]
+        verbose_name_plural = "избранное"
+        verbose_name = "избранный рецепт"
+
+
+class ShoppingCart(UserRecipe):
+    class Meta:
+        db_table = "users_user_shopping_cart"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="users_cart_user_recipe_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="cart_recipe_user_idx"
+            ),
+            models.Index(fields=["created_at"], name="cart_created_at_idx"),
+        ]
+        verbose_name_plural = "списки покупок"
+        verbose_name = "рецепт в списке покупок"
+
+
+class Subscription(models.Model):
+    from_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="subscription_set",
+        db_index=False,
+    )
+    to_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="subscriber_set",
+        db_index=False,
+    )
+    created_at = models.DateTimeField("подписан", auto_now_add=True)
+
+    class Meta:
+        db_table = "users_user_subscriptions"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["from_user", "to_user"],
+                name="users_subscriptions_from_to_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["to_user", "from_user"],
+                name="subscription_to_from_idx",
+            ),
+        ]
+        verbose_name_plural = "подписки"
+        verbose_name = "подписка"
+
+    def __str__(self):
+        return f"{self.from_user} -> {self.to_user}"